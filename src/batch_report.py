@@ -0,0 +1,132 @@
+"""Headless batch report: runs every analysis page's report() without Streamlit and writes the results.
+
+    python batch_report.py --data data --out reports --workers 4
+
+Each page gets a directory under --out with one file per table (CSV, or Parquet if pyarrow is
+installed), one PNG per figure and a metrics.json. manifest.json records the data files the
+report was built from and the status and duration of every page.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from utils.data_loader import DATASETS, file_signature
+from utils.data_store import get_store
+from utils.page_registry import PAGES, load_module
+
+# (output directory, page module, tables passed to report() in order)
+REPORT_PAGES = [(page.slug, page.module_name, page.tables) for page in PAGES]
+
+def _json_default(value):
+    # numpy scalars and anything else json can't encode
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+def write_report(page_report, page_directory, table_format='csv'):
+    """Writes the tables, figures and metrics of one report() result; returns the file names."""
+    from utils.figure_cache import render_figure
+
+    files = []
+    for name, table in page_report.get('tables', {}).items():
+        file_name = f"{name}.{table_format}"
+        path = os.path.join(page_directory, file_name)
+        if table_format == 'parquet':
+            table.to_parquet(path, index=False)
+        else:
+            table.to_csv(path, index=False)
+        files.append(file_name)
+    for name, draw in page_report.get('figures', {}).items():
+        file_name = f"{name}.png"
+        with open(os.path.join(page_directory, file_name), 'wb') as f:
+            f.write(render_figure(draw()))
+        files.append(file_name)
+    if page_report.get('metrics'):
+        with open(os.path.join(page_directory, 'metrics.json'), 'w') as f:
+            json.dump(page_report['metrics'], f, indent=2, default=_json_default)
+        files.append('metrics.json')
+    return files
+
+def run_page(page, module_name, table_names, data_directory, output_directory, table_format='csv'):
+    """Builds and writes one page's report; returns (page, status) and never raises."""
+    start = time.perf_counter()
+    page_directory = os.path.join(output_directory, page)
+    try:
+        os.makedirs(page_directory, exist_ok=True)
+        tables = get_store(data_directory).tables(table_names)
+        module = load_module(module_name)
+        page_report = module.report(*(tables[name] for name in table_names))
+        status = {'status': 'ok', 'files': write_report(page_report, page_directory, table_format)}
+    except Exception as exc:
+        status = {'status': 'error', 'error': f"{type(exc).__name__}: {exc}", 'traceback': traceback.format_exc()}
+    status['seconds'] = round(time.perf_counter() - start, 3)
+    return page, status
+
+def warm_store(data_directory, table_names):
+    """Loads the tables once in the parent so forked workers inherit them (and the disk cache is written once)."""
+    store = get_store(data_directory)
+    for name in table_names:
+        try:
+            store.table(name)
+        except OSError:
+            pass  # Missing file: the pages that need it report the error themselves
+
+def data_signature(data_directory):
+    signature = {}
+    for key, file_name in DATASETS.items():
+        try:
+            signature[file_name] = file_signature(os.path.join(data_directory, file_name))
+        except OSError:
+            signature[file_name] = None
+    return signature
+
+def build_report(data_directory, output_directory, pages=None, workers=None, table_format='csv'):
+    """Runs the selected pages (all by default) across a process pool and writes manifest.json."""
+    selected = [entry for entry in REPORT_PAGES if pages is None or entry[0] in pages]
+    os.makedirs(output_directory, exist_ok=True)
+    warm_store(data_directory, sorted({name for _, _, names in selected for name in names}))
+
+    start = time.perf_counter()
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_page, page, module_name, table_names, data_directory, output_directory, table_format)
+                   for page, module_name, table_names in selected]
+        for future in as_completed(futures):
+            page, status = future.result()
+            results[page] = status
+            print(f"{page:25s} {status['status']:5s} {status['seconds']:8.2f}s", file=sys.stderr)
+
+    manifest = {
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'data_directory': os.path.abspath(data_directory),
+        'data_files': data_signature(data_directory),
+        'table_format': table_format,
+        'seconds': round(time.perf_counter() - start, 3),
+        'pages': {page: results[page] for page, _, _ in selected},
+    }
+    with open(os.path.join(output_directory, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2, default=_json_default)
+    return manifest
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute every analysis page without Streamlit.")
+    parser.add_argument('--data', default='data', help="Directory with the Ergast CSV files")
+    parser.add_argument('--out', default='reports', help="Output directory")
+    parser.add_argument('--pages', nargs='+', choices=[page for page, _, _ in REPORT_PAGES],
+                        help="Only build these pages")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv',
+                        help="Table format; parquet needs pyarrow")
+    args = parser.parse_args(argv)
+
+    manifest = build_report(args.data, args.out, args.pages, args.workers, args.format)
+    failed = [page for page, status in manifest['pages'].items() if status['status'] != 'ok']
+    for page in failed:
+        print(f"{page} failed: {manifest['pages'][page]['error']}", file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
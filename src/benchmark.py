@@ -0,0 +1,260 @@
+"""Benchmarks for data loading and each page's heavy computation, at several data scales.
+
+    python benchmark.py                          # shipped data at 1x and 10x
+    python benchmark.py --large                  # and at 100x (needs several GB of memory)
+    python benchmark.py --scales 1 10 --cases head_to_head driver_movements
+    python benchmark.py --save-baseline          # store the results as the new baseline
+    python benchmark.py --baseline other.json    # compare against another stored run
+
+Scaled data sets are the CSVs of --data tiled N times with every id column offset per copy,
+so N× data has N× races, drivers and constructors with the same per-race shape. With
+--synthetic every scale is generated by synthetic_data.py instead (N× the seasons, with
+lap times). Each case is
+timed --repeat times (best run reported) and run once more under tracemalloc for its peak
+Python/NumPy allocation. Results that are slower or bigger than the baseline by more than
+--tolerance (and by more than MIN_DELTA) are reported as regressions and make the command exit
+non-zero.
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+import pandas as pd
+from utils import memo
+from utils.data_loader import DATASETS, load_dataset
+from synthetic_data import generate_to
+
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+# Scales a plain machine runs by default; --large adds LARGE_SCALE
+DEFAULT_SCALES = [1, 10]
+LARGE_SCALE = 100
+# Differences below these are timer/allocator noise, whatever the relative change
+MIN_DELTA = {'seconds': 0.05, 'peak_mb': 1.0}
+
+def _tables(*names):
+    def decorator(fn):
+        fn.tables = names
+        return fn
+    return decorator
+
+# Each case takes the loaded tables (and the data directory) and returns the callable to time
+
+def case_load_csv(data_directory, tables):
+    """Parse every dataset from CSV (no cache)."""
+    keys = [key for key, file_name in DATASETS.items() if os.path.exists(os.path.join(data_directory, file_name))]
+    return lambda: [load_dataset(data_directory, key, use_cache=False) for key in keys]
+
+def case_load_cached(data_directory, tables):
+    """Load every dataset from the on-disk cache."""
+    keys = [key for key, file_name in DATASETS.items() if os.path.exists(os.path.join(data_directory, file_name))]
+    for key in keys:
+        load_dataset(data_directory, key)  # Writes the cache
+    return lambda: [load_dataset(data_directory, key) for key in keys]
+
+@_tables('results')
+def case_head_to_head(data_directory, tables):
+    """Head-to-head win counts of every driver pair."""
+    from utils.rivalry import head_to_head_table
+    return lambda: head_to_head_table(tables['results'])
+
+@_tables('results', 'races')
+def case_driver_movements(data_directory, tables):
+    """Constructor transitions of every driver and their from/to counts."""
+    from utils.transitions import transition_counts, transition_rows
+    return lambda: transition_counts(transition_rows(tables['results'], tables['races']))
+
+@_tables('driver_standings', 'constructor_standings', 'races', 'drivers', 'constructors')
+def case_predict_2025(data_directory, tables):
+    """Per-driver and per-constructor trend fits of the 2025 predictions."""
+    from models.predict_2025 import predict_champion, predict_constructor_champion
+    def run():
+        predict_champion(tables['driver_standings'], tables['races'], tables['drivers'])
+        predict_constructor_champion(tables['constructor_standings'], tables['races'], tables['constructors'])
+    return run
+
+@_tables('pit_stops', 'results')
+def case_pit_stop_model(data_directory, tables):
+    """Random Forest fit of the pit stop page (data prep included)."""
+    from models.pit_stop_strategies import MODEL_PARAMS, modeling_data, train_finish_model
+    return lambda: train_finish_model(modeling_data(tables['pit_stops'], tables['results']), **MODEL_PARAMS)
+
+@_tables('results')
+def case_consistency_model(data_directory, tables):
+    """Random Forest fit of the driver consistency page."""
+    from models.driver_consistency import train_performance_model
+    return lambda: train_performance_model(tables['results'][['grid', 'laps', 'milliseconds', 'positionOrder']])
+
+CASES = {
+    'load_csv': case_load_csv,
+    'load_cached': case_load_cached,
+    'head_to_head': case_head_to_head,
+    'driver_movements': case_driver_movements,
+    'predict_2025': case_predict_2025,
+    'pit_stop_model': case_pit_stop_model,
+    'consistency_model': case_consistency_model,
+}
+
+def _id_offsets(raw):
+    """Per id column, a stride larger than every id in use, so tiled copies never collide."""
+    offsets = {}
+    for df in raw.values():
+        for column in df.columns:
+            if column.endswith('Id'):
+                ids = pd.to_numeric(df[column], errors='coerce')
+                offsets[column] = max(offsets.get(column, 0), int(ids.max()) + 1)
+    return offsets
+
+def scale_data(data_directory, factor, output_directory):
+    """Writes the datasets of data_directory tiled `factor` times into output_directory."""
+    raw = {}
+    for file_name in DATASETS.values():
+        path = os.path.join(data_directory, file_name)
+        if os.path.exists(path):
+            # Read as text so values such as '\\N' are written back unchanged
+            raw[file_name] = pd.read_csv(path, dtype=str, keep_default_na=False)
+    offsets = _id_offsets(raw)
+
+    os.makedirs(output_directory, exist_ok=True)
+    for file_name, df in raw.items():
+        copies = []
+        for copy in range(factor):
+            tiled = df.copy()
+            for column in df.columns:
+                if column in offsets and copy:
+                    ids = pd.to_numeric(df[column], errors='coerce')
+                    tiled[column] = (ids + copy * offsets[column]).astype('Int64').astype(str).where(ids.notna(), df[column])
+            copies.append(tiled)
+        pd.concat(copies, ignore_index=True).to_csv(os.path.join(output_directory, file_name), index=False)
+    return output_directory
+
+def measure(fn, repeat):
+    """Best wall time over `repeat` runs, then the tracemalloc peak of one more run (MB)."""
+    timings = []
+    for _ in range(repeat):
+        memo.clear_all()  # Every run recomputes memoized intermediates from scratch
+        gc.collect()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    memo.clear_all()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {'seconds': round(min(timings), 4), 'peak_mb': round(peak / 2 ** 20, 2)}
+
+def run_benchmarks(data_directory, scales, cases, repeat, work_directory, synthetic=False, seed=0):
+    results = {}
+    for scale in scales:
+        if synthetic:
+            print(f"Generating {scale}x synthetic data...", file=sys.stderr)
+            scale_directory = os.path.join(work_directory, f"synthetic-x{scale}")
+            generate_to(scale_directory, seasons=75 * scale, seed=seed)
+        elif scale == 1:
+            scale_directory = os.path.join(work_directory, 'x1')
+            # Copy so the cache written by load_cached never touches the real data directory
+            os.makedirs(scale_directory, exist_ok=True)
+            for file_name in DATASETS.values():
+                if os.path.exists(os.path.join(data_directory, file_name)):
+                    shutil.copy(os.path.join(data_directory, file_name), scale_directory)
+        else:
+            print(f"Generating {scale}x data...", file=sys.stderr)
+            scale_directory = scale_data(data_directory, scale, os.path.join(work_directory, f"x{scale}"))
+
+        needed = sorted({name for case in cases for name in getattr(CASES[case], 'tables', ())})
+        tables = {name: load_dataset(scale_directory, name) for name in needed}
+        for case in cases:
+            fn = CASES[case](scale_directory, tables)
+            result = measure(fn, repeat)
+            results[f"{case}@{scale}x"] = result
+            print(f"{case + '@' + str(scale) + 'x':28s} {result['seconds']:10.4f}s {result['peak_mb']:10.2f} MB",
+                  file=sys.stderr)
+        del tables
+        memo.clear_all()
+    return results
+
+def environment():
+    import numpy
+    import sklearn
+    return {
+        'python': platform.python_version(),
+        'pandas': pd.__version__,
+        'numpy': numpy.__version__,
+        'sklearn': sklearn.__version__,
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+    }
+
+def compare(results, baseline, tolerance):
+    """Names and details of the results that regressed against the baseline."""
+    regressions = []
+    for name, result in results.items():
+        previous = baseline.get('results', {}).get(name)
+        if previous is None:
+            continue
+        for metric in ('seconds', 'peak_mb'):
+            if (result[metric] > previous[metric] * (1 + tolerance)
+                    and result[metric] - previous[metric] > MIN_DELTA[metric]):
+                regressions.append(f"{name} {metric}: {previous[metric]} -> {result[metric]}")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark data loading and the pages' core computations.")
+    parser.add_argument('--data', default='data', help="Directory with the Ergast CSV files")
+    parser.add_argument('--scales', type=int, nargs='+', default=DEFAULT_SCALES, help="Data scale factors")
+    parser.add_argument('--large', action='store_true',
+                        help=f"Also run at {LARGE_SCALE}x; head_to_head alone needs several GB there")
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--synthetic', action='store_true', help="Benchmark generated data instead of --data")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the --synthetic data")
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per case (best is reported)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="Baseline file to compare against")
+    parser.add_argument('--save-baseline', action='store_true', help="Write the results to --baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown/growth vs the baseline")
+    parser.add_argument('--output', help="Also write the results to this JSON file")
+    args = parser.parse_args(argv)
+    scales = args.scales + ([LARGE_SCALE] if args.large and LARGE_SCALE not in args.scales else [])
+
+    work_directory = tempfile.mkdtemp(prefix='f1-benchmark-')
+    try:
+        results = run_benchmarks(args.data, scales, args.cases, args.repeat, work_directory,
+                                 args.synthetic, args.seed)
+    finally:
+        shutil.rmtree(work_directory, ignore_errors=True)
+    report = {'environment': environment(), 'source': 'synthetic' if args.synthetic else 'tiled', 'results': results}
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.", file=sys.stderr)
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get('environment') != report['environment']:
+        print("Note: baseline was recorded in a different environment.", file=sys.stderr)
+    if baseline.get('source', 'tiled') != report['source']:
+        print(f"Note: baseline was recorded on {baseline.get('source', 'tiled')} data.", file=sys.stderr)
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
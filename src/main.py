@@ -1,10 +1,18 @@
 import streamlit as st
 import os
-from utils.data_loader import load_all_data
+import pandas as pd
+from utils.data_store import get_store
+from utils.page_registry import PAGES_BY_TITLE, import_times, prewarm
+from utils.profiling import phase, profile_page
+from utils.warmup import start_warmup
 
-# Load all datasets
-data_directory = os.path.join('data')
-data = load_all_data(data_directory)
+# All datasets come from one process-wide store, so reruns and concurrent sessions share a single parse
+# F1_DATA_DIR points the app at another data set, e.g. one written by synthetic_data.py
+data_directory = os.environ.get('F1_DATA_DIR', os.path.join('data'))
+# F1_WARMUP=1 precomputes the heavy page aggregates in the background, most expensive first
+warmup_enabled = os.environ.get('F1_WARMUP') == '1'
+if warmup_enabled:
+    start_warmup(get_store(data_directory))
 
 # Custom CSS to enhance the UI
 st.markdown("""
@@ -92,54 +100,49 @@ with st.sidebar:
             st.session_state.selected_option = "Driver Movements"
     
     st.markdown("---")
+    # Refresh picks up rows appended to the CSVs (e.g. after a race weekend); Reload starts from scratch
+    if st.button("➕ Refresh Data"):
+        changes = get_store(data_directory).refresh()
+        st.write(", ".join(f"{name}: {change}" for name, change in changes.items()) or "No changes")
+        if warmup_enabled and changes:
+            start_warmup(get_store(data_directory), restart=True)
+    if st.button("🔄 Reload Data"):
+        get_store(data_directory).invalidate()
+        if warmup_enabled:
+            start_warmup(get_store(data_directory), restart=True)
+    # Phase timings of the page (and peak memory, which slows it down); F1_PROFILE=1 turns them on by default
+    profiling = st.checkbox("⏱️ Profile pages", value=os.environ.get('F1_PROFILE') == '1')
+    track_memory = profiling and st.checkbox("Track memory (slower)", value=False)
     st.markdown("Made by Pavan Kumar")
 
+# Shared workers switch to a newly published snapshot on their next rerun (one manifest read)
+if get_store(data_directory).backend == 'shared':
+    get_store(data_directory).refresh()
+
 # Display content based on selection
 if st.session_state.selected_option:
     st.subheader(f"🔍 {st.session_state.selected_option}")
-    
-    if st.session_state.selected_option == "Driver Performance":
-        import models.driver_performance as driver_performance
-        driver_performance.run(data['drivers'], data['results'], data['driver_standings'],data['races'])
-    elif st.session_state.selected_option == "Qualifying vs Race Performance":
-        import models.qualifying_vs_race as qualifying_vs_race
-        qualifying_vs_race.run(data['qualifying'], data['results'],data['drivers'])
-    elif st.session_state.selected_option == "Pit Stop Strategies":
-        import models.pit_stop_strategies as pit_stop_strategies
-        pit_stop_strategies.run(data['pit_stops'], data['results'])
-    elif st.session_state.selected_option == "Head-to-Head Analysis":
-        import models.head_to_head as head_to_head
-        head_to_head.run(data['results'], data['drivers'])
-    elif st.session_state.selected_option == "Hypothetical Driver Swaps":
-        import models.hypothetical_swaps as hypothetical_swaps
-        hypothetical_swaps.run(data['results'], data['drivers'], data['driver_standings'])
-    elif st.session_state.selected_option == "Driver Movements":
-        import models.driver_movements as driver_movements
-        driver_movements.run(data['results'], data['drivers'], data['constructors'],data['races'])
-    elif st.session_state.selected_option == "Team Performance":
-        import models.team_performance as team_performance
-        team_performance.run(data['results'], data['constructors'])
-    elif st.session_state.selected_option == "Driver Consistency":
-        import models.driver_consistency as driver_consistency
-        driver_consistency.run(data['results'], data['drivers'],data['constructors'])
-    elif st.session_state.selected_option == "Lap Time Efficiency":
-        import models.lap_time_efficiency as lap_time_efficiency
-        lap_time_efficiency.run(data['lap_times'], data['races'])
-    elif st.session_state.selected_option == "Best Team Lineup":
-        import models.best_team_lineup as best_team_lineup
-        best_team_lineup.run()
-    elif st.session_state.selected_option == "Predict 2025 Season":
-        import models.predict_2025 as predict_2025
-        predict_2025.run(data['driver_standings'], data['results'], data['races'],data['drivers'],data['races'])
-    elif st.session_state.selected_option == "Struggling Teams":
-        import models.struggling_teams as struggling_teams
-        struggling_teams.run(data['results'], data['constructors'])
-    elif st.session_state.selected_option == "Driver Track Struggles":
-        import models.track_struggles as track_struggles
-        track_struggles.run(data['results'], data['races'], data['drivers'])
-    elif st.session_state.selected_option == "Championship Retention":
-        import models.championship_retention as championship_retention
-        championship_retention.run()
-    elif st.session_state.selected_option == "Champion Age Trends":
-        import models.champion_age_trends as champion_age_trends
-        champion_age_trends.run(data['driver_standings'], data['races'], data['drivers'])
\ No newline at end of file
+    with profile_page(st.session_state.selected_option, profiling, track_memory) as profile:
+        with phase('load'):
+            page = PAGES_BY_TITLE[st.session_state.selected_option]
+            # With the sqlite backend, per-driver/constructor pages query their rows instead
+            store = get_store(data_directory)
+            data = store.tables(page.tables_for(store))
+
+        with phase('compute'):
+            # The page module (and what it imports) is loaded the first time the page is opened
+            page.run(data, store)
+
+    if profile is not None:
+        st.sidebar.markdown("**⏱️ Page profile**")
+        st.sidebar.table(pd.DataFrame(profile.totals()).set_index('phase'))
+        if import_times():
+            st.sidebar.markdown("**📦 Page imports**")
+            st.sidebar.table(pd.DataFrame(import_times())[['module', 'seconds']].set_index('module'))
+        if warmup_enabled:
+            st.sidebar.markdown("**🔥 Warmup**")
+            st.sidebar.table(pd.DataFrame(start_warmup(get_store(data_directory)).status()).set_index('page'))
+
+# F1_PREWARM=1 imports the remaining pages in the background once the first page has rendered
+if os.environ.get('F1_PREWARM') == '1':
+    prewarm()
@@ -1,26 +1,25 @@
 import streamlit as st
 import pandas as pd
-from utils.data_loader import load_all_data
-def run():
-    # Load all datasets
-    data_directory = 'data'  # Adjust this path as necessary
-    data = load_all_data(data_directory)
-
-    drivers = data['drivers']
-    results = data['results']
-    driver_standings = data['driver_standings']
+from utils.entity_index import driver_index
 
+def best_lineup(results, driver_standings, drivers, size=2):
     # Compute average points per race for each driver
     driver_races = results.groupby('driverId')['raceId'].nunique()
     driver_points = driver_standings.groupby('driverId')['points'].sum()
     performance = (driver_points / driver_races).sort_values(ascending=False)
 
     # Build the best team lineup
-    best_lineup = performance.head(2)
-    driver_names = drivers.set_index('driverId').apply(lambda row: f"{row['forename']} {row['surname']}", axis=1)
-    best_lineup = best_lineup.rename(index=driver_names)
+    return performance.head(size).rename(index=driver_index(drivers).names)
+
+def report(results, driver_standings, drivers):
+    """Headless version of the page for batch_report."""
+    lineup = best_lineup(results, driver_standings, drivers)
+    return {'tables': {'best_lineup': lineup.rename('points_per_race').rename_axis('driver').reset_index()}}
+
+def run(results, driver_standings, drivers):
+    best_lineup_table = best_lineup(results, driver_standings, drivers)
 
     # Streamlit application layout
     st.title("Best Team Lineup")
     st.write("The following drivers are the best team lineup based on average points per race:")
-    st.table(best_lineup)
\ No newline at end of file
+    st.table(best_lineup_table)
\ No newline at end of file
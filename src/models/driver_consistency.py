@@ -1,45 +1,46 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-import plotly.express as px
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
-from utils.data_loader import load_all_data
+from utils.data_loader import impute, load_all_data
+from utils.entity_index import driver_index
+from utils.memo import memoize_frames
+from utils.training_scheduler import submit_fit
+from utils.profiling import phase
 
-# Load all datasets
-data_directory = 'data'  
-data = load_all_data(data_directory)
-
-results = data['results']
-drivers = data['drivers']
-
-# Analyze driver consistency
-def analyze_driver_consistency():
+@memoize_frames
+def finish_statistics(results):
+    """Mean and standard deviation of every driver's finishing position, and their race count."""
     driver_finish_std = results.groupby('driverId')['positionOrder'].std()
     driver_finish_mean = results.groupby('driverId')['positionOrder'].mean()
     race_counts = results.groupby('driverId')['raceId'].nunique()
     
-    consistent_drivers = pd.DataFrame({
+    return pd.DataFrame({
         'mean_finish': driver_finish_mean, 
         'std_finish': driver_finish_std, 
         'races': race_counts
     })
+
+# Analyze driver consistency
+def analyze_driver_consistency(results, drivers):
+    consistent_drivers = finish_statistics(results)
     consistent_drivers = consistent_drivers[consistent_drivers['races'] >= 20]
     consistent_drivers = consistent_drivers.sort_values('std_finish')
     
-    driver_names = drivers.set_index('driverId').apply(lambda row: f"{row['forename']} {row['surname']}", axis=1)
-    consistent_drivers['driver_name'] = consistent_drivers.index.map(driver_names)
+    consistent_drivers['driver_name'] = consistent_drivers.index.map(driver_index(drivers).names)
     
     return consistent_drivers
 
 # Predictive Model for Driver Performance
-def train_performance_model():
-    # Creating a binary classification: 1 (Top 5 finish), 0 (Other)
-    results['top_5'] = (results['positionOrder'] <= 5).astype(int)
+def train_performance_model(results):
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import accuracy_score
+    from sklearn.model_selection import train_test_split
 
-    features = results[['grid', 'laps', 'milliseconds']].fillna(0)  
-    target = results['top_5']
+    # Creating a binary classification: 1 (Top 5 finish), 0 (Other)
+    # (kept off the shared results frame, which other pages read too)
+    # Unfinished races have no total time; fill it with the median as the model was built on
+    features = impute(results[['grid', 'laps', 'milliseconds']], ['milliseconds'])
+    target = (results['positionOrder'] <= 5).astype(int)
 
     X_train, X_test, y_train, y_test = train_test_split(features, target, test_size=0.2, random_state=42)
 
@@ -51,18 +52,44 @@ def train_performance_model():
 
     return model, accuracy
 
+@memoize_frames
+def performance_training_data(results):
+    """The columns the top-5 model trains on; one frame per results, so its fingerprint is hashed once."""
+    return results[['grid', 'laps', 'milliseconds', 'positionOrder']]
+
+def performance_model_fit(results):
+    """Future of the (model, accuracy) pair, fetched from the registry or trained in the background."""
+    return submit_fit('driver_top5', train_performance_model, [performance_training_data(results)])
+
+def warmup(drivers, results, constructors):
+    """Background precomputation for utils.warmup; the model fit keeps running on its own pool."""
+    finish_statistics(results)
+    performance_model_fit(results)
+
+def report(drivers, results, constructors):
+    """Headless version of the page for batch_report."""
+    _, accuracy = performance_model_fit(results).result()
+    return {
+        'tables': {'consistency': analyze_driver_consistency(results, drivers).reset_index()},
+        'metrics': {'top5_model_accuracy': accuracy},
+    }
+
 # Streamlit UI
 def run(drivers,results,constructors):
     st.title("Driver Performance & Consistency Analysis")
     st.write("This dashboard provides insights on driver consistency and performance predictions.")
 
-    consistent_drivers = analyze_driver_consistency()
+    # Start (or reuse) the model fit in the background before drawing anything
+    fit = performance_model_fit(results)
+
+    consistent_drivers = analyze_driver_consistency(results, drivers)
     st.subheader("Top 10 Most Consistent Drivers")
     st.dataframe(consistent_drivers[['driver_name', 'mean_finish', 'std_finish', 'races']].head(10))
 
     # Predictive Model
-    model, accuracy = train_performance_model()
-    st.subheader(f"Driver Performance Prediction Model (Accuracy: {accuracy:.2f})")
+    model_header = st.empty()
+    if not fit.done():
+        model_header.info("Model warming up... predictions appear as soon as training finishes.")
 
     # User input for predictions
     st.write("Predict whether a driver will finish in the Top 5:")
@@ -70,10 +97,14 @@ def run(drivers,results,constructors):
     laps = st.number_input("Laps Completed", min_value=30, max_value=80, value=50)
     milliseconds = st.number_input("Total Time (ms)", min_value=50000, max_value=200000, value=100000)
 
+    with phase('fit'):
+        model, accuracy = fit.result()
+    model_header.subheader(f"Driver Performance Prediction Model (Accuracy: {accuracy:.2f})")
     prediction = model.predict(np.array([[grid, laps, milliseconds]]))[0]
     result = "Top 5 Finish" if prediction == 1 else "Below Top 5"
     st.write(f"Prediction: **{result}**")
 
 # Run Streamlit App
 if __name__ == "__main__":
-    run()
+    data = load_all_data('data')
+    run(data['drivers'], data['results'], data['constructors'])
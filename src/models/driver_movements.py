@@ -1,57 +1,77 @@
 import streamlit as st
 import pandas as pd
-import seaborn as sns
 import matplotlib.pyplot as plt
 from utils.data_loader import load_all_data
+from utils.entity_index import constructor_index
+from utils.figure_cache import show_figure
+from utils.paged_table import paged_table
+from utils.transitions import collapsed_matrix, transition_counts, transition_rows
+
+# Constructors drawn in the heatmap by default; the rest are collapsed into "Other"
+TOP_CONSTRUCTORS = 15
+
+def transition_counts_table(counts, constructors):
+    """Number of times each transition happened, most frequent first, with constructor names."""
+    cons_names = constructor_index(constructors).names
+    return counts.assign(From=counts['From'].map(cons_names), To=counts['To'].map(cons_names))
+
+def named_matrix(counts, constructors, k=TOP_CONSTRUCTORS):
+    """collapsed_matrix with constructor names as labels."""
+    cons_names = constructor_index(constructors).names
+    matrix = collapsed_matrix(counts, k)
+    return matrix.rename(index=cons_names, columns=cons_names)
+
+def draw_heatmap(pivot_table):
+    import seaborn as sns
+    fig, ax = plt.subplots(figsize=(10, 8))
+    sns.heatmap(pivot_table, annot=True, fmt="d", cmap="YlGnBu", ax=ax)
+    ax.set_xlabel("To Constructor")
+    ax.set_ylabel("From Constructor")
+    ax.set_title("Driver Transitions Between Constructors")
+    return fig
+
+def warmup(results, drivers, constructors, races):
+    """Background precomputation for utils.warmup."""
+    transition_counts(transition_rows(results, races))
+
+def report(results, drivers, constructors, races):
+    """Headless version of the page for batch_report."""
+    counts = transition_counts(transition_rows(results, races))
+    if counts.empty:
+        return {}
+    pivot_table = named_matrix(counts, constructors)
+    return {
+        'tables': {'transitions': transition_counts_table(counts, constructors)},
+        'figures': {'transition_heatmap': lambda: draw_heatmap(pivot_table)},
+    }
 
 def run(results, drivers, constructors, races):
     st.title("F1 Driver Movements - Transition Heatmap")
 
-    # Merge race results with race years to sort chronologically per driver
-    merged = pd.merge(results, races[['raceId', 'year']], on='raceId', how='left')
-
-    # Compute transitions for each driver
-    transitions = []
-    for driver, group in merged.groupby('driverId'):
-        group = group.sort_values('year')
-        # Get the sequence of constructor IDs for the driver
-        constructor_sequence = group['constructorId'].tolist()
-        # Record a transition if the constructor changes between consecutive races
-        for i in range(1, len(constructor_sequence)):
-            if constructor_sequence[i] != constructor_sequence[i-1]:
-                transitions.append((constructor_sequence[i-1], constructor_sequence[i]))
-                
-    if not transitions:
+    # Limit the moves to an era and the heatmap to the busiest constructors
+    first_year, last_year = int(races['year'].min()), int(races['year'].max())
+    seasons = st.slider("Seasons", min_value=first_year, max_value=last_year, value=(first_year, last_year),
+                        key='driver_movements_seasons')
+    top = st.slider("Constructors shown", min_value=5, max_value=40, value=TOP_CONSTRUCTORS,
+                    key='driver_movements_top')
+    era = (None, None) if seasons == (first_year, last_year) else seasons
+    counts = transition_counts(transition_rows(results, races), *era)
+    if counts.empty:
         st.error("No driver transitions found in the data.")
         return
 
-    # Create a DataFrame of transitions
-    transitions_df = pd.DataFrame(transitions, columns=['From', 'To'])
-
-    # Create a pivot table for the transitions counts
-    pivot_table = pd.crosstab(transitions_df['From'], transitions_df['To'])
-
     st.subheader("Driver Transition Heatmap")
-    st.write("This heatmap shows the number of times drivers switched from one constructor to another.")
+    st.write("This heatmap shows the number of times drivers switched from one constructor to another. "
+             f"The {top} constructors with the most moves are shown; the rest are grouped as \"Other\".")
 
     # Plot the heatmap
-    fig, ax = plt.subplots(figsize=(10, 8))
-    sns.heatmap(pivot_table, annot=True, fmt="d", cmap="YlGnBu", ax=ax)
-    ax.set_xlabel("To Constructor")
-    ax.set_ylabel("From Constructor")
-    ax.set_title("Driver Transitions Between Constructors")
-    st.pyplot(fig)
+    show_figure('driver_movements', {'seasons': list(seasons), 'top': top}, [results, races, constructors],
+                lambda: draw_heatmap(named_matrix(counts, constructors, top)))
 
-    # Display top transitions as a table
+    # Display the transitions as a table
     st.subheader("Top Driver Transitions")
-    transition_counts = transitions_df.value_counts().reset_index(name='Count')
-    transition_counts = transition_counts.sort_values('Count', ascending=False)
-    
-    # Map constructor IDs to names
-    cons_names = constructors.set_index('constructorId')['name'].to_dict()
-    transition_counts['From'] = transition_counts['From'].map(cons_names)
-    transition_counts['To'] = transition_counts['To'].map(cons_names)
-    st.dataframe(transition_counts.head(10))
+    paged_table(transition_counts_table(counts, constructors), 'driver_movements_transitions', sort_by='Count',
+                search=['From', 'To'], page_size=10)
 
 if __name__ == "__main__":
     data = load_all_data('data')
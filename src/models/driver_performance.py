@@ -1,63 +1,85 @@
 import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
-import seaborn as sns
 from utils.data_loader import load_all_data
-from sklearn.linear_model import LinearRegression
+from utils.partition_index import rows_for
+from utils.season_tables import season_points
+from utils.trend_fit import grouped_linear_fit
 import numpy as np
+from utils.entity_index import driver_index, select_entity
+from utils.figure_cache import show_figure
+from utils.memo import memoize_frames
+from utils.profiling import phase
 
-def driver_performance(driver_id, results, driver_standings):
-    # Filter data for the selected driver
-    driver_results = results[results['driverId'] == driver_id]
-    driver_standings_data = driver_standings[driver_standings['driverId'] == driver_id]
+def driver_performance(driver_id, drivers, results, driver_standings, store=None):
+    if store is not None:
+        # Only this driver's finishes and points come out of SQLite
+        finishes = store.select('results', ['raceId', 'positionOrder'], driverId=driver_id)
+        if finishes.empty:
+            return 0, 0, 0, 0
+        points = store.aggregate('driver_standings', 'driverId', 'points', driverId=driver_id)['points'].sum()
+        return (finishes['raceId'].nunique(), (finishes['positionOrder'] == 1).sum(),
+                (finishes['positionOrder'] <= 3).sum(), points)
+    # The selected driver's row of the career summary the report is built from
+    career = rows_for(career_summary(drivers, results, driver_standings), 'driverId', driver_id)
+    if career.empty:
+        return 0, 0, 0, 0
+    career = career.iloc[0]
+    return career['total_races'], career['total_wins'], career['total_podiums'], career['total_points']
 
-    # Calculate performance metrics
-    total_races = driver_results['raceId'].nunique()
-    total_wins = driver_results[driver_results['positionOrder'] == 1].shape[0]
-    total_podiums = driver_results[driver_results['positionOrder'] <= 3].shape[0]
-    total_points = driver_standings_data['points'].sum()
-    
-    return total_races, total_wins, total_podiums, total_points
-
-def predict_future_performance(driver_id, results, races):
-    # Merge results with races to get the 'year'
-    driver_results = results[results['driverId'] == driver_id].merge(
-        races[['raceId', 'year']], on='raceId', how='left'
-    )
-
-    # Group by year to sum points per season
-    yearly_points = driver_results.groupby('year')['points'].sum().reset_index()
+def predict_future_performance(driver_id, results, races, store=None):
+    if store is not None:
+        yearly_points = store.aggregate('results', 'year', 'points', with_year=True, driverId=driver_id)
+        yearly_points = yearly_points.dropna(subset=['year'])  # Results of races missing from races.csv
+    else:
+        # Season points of every driver are built once and shared; take this driver's seasons
+        all_points = season_points(results, races, 'driverId')
+        yearly_points = rows_for(all_points, 'driverId', driver_id)[['year', 'points']].copy()
 
     if len(yearly_points) < 5:
         return None  # Not enough data for prediction
     
-    X = yearly_points['year'].values.reshape(-1, 1)
-    y = yearly_points['points'].values
-    model = LinearRegression()
-    model.fit(X, y)
+    yearly_points['driverId'] = driver_id
+    fit = grouped_linear_fit(yearly_points, 'driverId').iloc[0]
     
     # Generate future years based on the latest year in the data
     latest_year = yearly_points['year'].max()
-    future_years = np.array([[latest_year + i] for i in range(1, 4)])
-    predictions = model.predict(future_years)
+    future_years = np.array([latest_year + i for i in range(1, 4)])
+    predictions = fit['intercept'] + fit['slope'] * future_years
     
-    return future_years.flatten(), predictions
+    return future_years, predictions
 
-def run(drivers, results, driver_standings, races):
+@memoize_frames
+def career_summary(drivers, results, driver_standings):
+    """The page's performance metrics for every driver at once."""
+    finishes = results[['driverId', 'raceId']].assign(
+        wins=results['positionOrder'] == 1, podiums=results['positionOrder'] <= 3)
+    summary = finishes.groupby('driverId').agg(
+        total_races=('raceId', 'nunique'), total_wins=('wins', 'sum'), total_podiums=('podiums', 'sum'))
+    summary['total_points'] = driver_standings.groupby('driverId')['points'].sum().reindex(summary.index, fill_value=0)
+    summary.insert(0, 'driver', summary.index.map(driver_index(drivers).names))
+    return summary.reset_index()
+
+def warmup(drivers, results, driver_standings, races):
+    """Background precomputation for utils.warmup."""
+    career_summary(drivers, results, driver_standings)
+    season_points(results, races, 'driverId')
+
+def report(drivers, results, driver_standings, races):
+    """Headless version of the page for batch_report; covers every driver instead of one."""
+    return {'tables': {'careers': career_summary(drivers, results, driver_standings)}}
+
+def run(drivers, results, driver_standings, races, store=None):
     st.title("F1 Driver Performance Analysis")
     st.sidebar.header("User Input")
     
     # Map driver full names to driver IDs
-    driver_options = {
-        f"{row['forename']} {row['surname']}": row['driverId']
-        for _, row in drivers.iterrows()
-    }
-    selected_driver_name = st.sidebar.selectbox("Select Driver", list(driver_options.keys()))
-    selected_driver_id = driver_options[selected_driver_name]
+    selected_driver_id, selected_driver_name = select_entity(
+        "Select Driver", driver_index(drivers), container=st.sidebar, key='driver_performance_driver')
     
     # Get and display performance metrics
     total_races, total_wins, total_podiums, total_points = driver_performance(
-        selected_driver_id, results, driver_standings
+        selected_driver_id, drivers, results, driver_standings, store
     )
     
     st.subheader(f"Performance Metrics for {selected_driver_name}")
@@ -68,27 +90,37 @@ def run(drivers, results, driver_standings, races):
     
     # Performance Visualization: Finishing Positions
     st.subheader("Driver Performance Visualization")
-    performance_data = results[results['driverId'] == selected_driver_id]
-    fig1, ax1 = plt.subplots(figsize=(10, 5))
-    sns.countplot(ax=ax1, data=performance_data, x='positionOrder', palette='viridis')
-    ax1.set_title(f"Finishing Positions for {selected_driver_name}")
-    ax1.set_xlabel("Finishing Position")
-    ax1.set_ylabel("Count")
-    st.pyplot(fig1)
+    if store is not None:
+        performance_data = store.select('results', ['raceId', 'positionOrder'], driverId=selected_driver_id)
+    else:
+        performance_data = rows_for(results, 'driverId', selected_driver_id)
+    def draw_positions():
+        import seaborn as sns
+        fig1, ax1 = plt.subplots(figsize=(10, 5))
+        sns.countplot(ax=ax1, data=performance_data, x='positionOrder', palette='viridis')
+        ax1.set_title(f"Finishing Positions for {selected_driver_name}")
+        ax1.set_xlabel("Finishing Position")
+        ax1.set_ylabel("Count")
+        return fig1
+    show_figure('driver_performance_positions', {'driver': selected_driver_id}, [performance_data], draw_positions)
     
     # Future Performance Prediction
-    prediction = predict_future_performance(selected_driver_id, results, races)
+    with phase('fit'):
+        prediction = predict_future_performance(selected_driver_id, results, races, store)
     if prediction is not None:
         future_years, predicted_points = prediction
         st.subheader("Predicted Future Performance")
-        fig2, ax2 = plt.subplots(figsize=(10, 5))
-        ax2.plot(future_years, predicted_points, marker='o', linestyle='dashed', 
-                 color='red', label='Predicted Points')
-        ax2.set_xlabel("Year")
-        ax2.set_ylabel("Predicted Points")
-        ax2.set_title(f"Predicted Points for {selected_driver_name} in Future Seasons")
-        ax2.legend()
-        st.pyplot(fig2)
+        def draw_prediction():
+            fig2, ax2 = plt.subplots(figsize=(10, 5))
+            ax2.plot(future_years, predicted_points, marker='o', linestyle='dashed', 
+                     color='red', label='Predicted Points')
+            ax2.set_xlabel("Year")
+            ax2.set_ylabel("Predicted Points")
+            ax2.set_title(f"Predicted Points for {selected_driver_name} in Future Seasons")
+            ax2.legend()
+            return fig2
+        predicted = pd.DataFrame({'year': future_years, 'points': predicted_points})
+        show_figure('driver_performance_prediction', {'driver': selected_driver_id}, [predicted], draw_prediction)
     else:
         st.write("Not enough data to predict future performance.")
 
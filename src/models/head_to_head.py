@@ -1,53 +1,69 @@
 import streamlit as st
 import pandas as pd
-from utils.data_loader import load_all_data
+from utils.rivalry import head_to_head_table, race_ids_for_seasons, rivalry_index
+from utils.entity_index import driver_index, select_entity
+from utils.memo import memoize_frames
+from utils.paged_table import PAGE_SIZE, paged_table, ranked_positions
+from utils.profiling import phase
 
-# Load all datasets
-data_directory = 'data'  # Adjust the path as necessary
-data = load_all_data(data_directory)
+@memoize_frames(bounded='race_ids')
+def rivalry_table(results, drivers, race_ids=None):
+    """Head-to-head win counts of every driver pair with driver names, in pair order."""
+    head_to_head_df = head_to_head_table(results, race_ids).copy()
+    driver_names = driver_index(drivers).names
+    head_to_head_df['driver1_name'] = head_to_head_df['driver1'].map(driver_names)
+    head_to_head_df['driver2_name'] = head_to_head_df['driver2'].map(driver_names)
+    return head_to_head_df
 
-drivers = data['drivers']
-results = data['results']
+def warmup(results, drivers, races):
+    """Background precomputation for utils.warmup: the all-seasons pair counts and index."""
+    table = rivalry_table(results, drivers)
+    ranked_positions(table, 'head_to_head_wins', PAGE_SIZE)  # The first page of the default view
+    rivalry_index(results)
 
-def run(results, drivers):
+def report(results, drivers, races):
+    """Headless version of the page for batch_report."""
+    table = rivalry_table(results, drivers).sort_values(by='head_to_head_wins', ascending=False)
+    return {'tables': {'head_to_head': table}}
+
+def run(results, drivers, races):
     st.title("Head-to-Head Driver Analysis")
 
-    head_to_head = {}
-    for race, group in results.groupby('raceId'):
-        race_results = group.sort_values('positionOrder')
-        drivers_in_race = race_results['driverId'].tolist()
-        for i in range(len(drivers_in_race)):
-            for j in range(i + 1, len(drivers_in_race)):
-                pair = (drivers_in_race[i], drivers_in_race[j])
-                head_to_head[pair] = head_to_head.get(pair, 0) + 1
-
-    head_to_head_df = pd.DataFrame([
-        {'driver1': pair[0], 'driver2': pair[1], 'head_to_head_wins': wins}
-        for pair, wins in head_to_head.items()
-    ])
-
-    driver_names = drivers.set_index('driverId').apply(lambda row: f"{row['forename']} {row['surname']}", axis=1)
-    head_to_head_df['driver1_name'] = head_to_head_df['driver1'].map(driver_names)
-    head_to_head_df['driver2_name'] = head_to_head_df['driver2'].map(driver_names)
+    # Limit the rivalries to an era; the win counts come from the cached pair engine
+    first_year, last_year = int(races['year'].min()), int(races['year'].max())
+    seasons = st.slider("Seasons", min_value=first_year, max_value=last_year, value=(first_year, last_year))
+    race_ids = None
+    if seasons != (first_year, last_year):
+        race_ids = race_ids_for_seasons(races, *seasons)
+    head_to_head_df = rivalry_table(results, drivers, race_ids)
 
     st.write("Head-to-Head Rivalries among Drivers:")
-    st.dataframe(head_to_head_df.sort_values(by='head_to_head_wins', ascending=False))
+    with phase('render'):
+        # One page of the pairs at a time, ranked on the server, however many pairs there are
+        paged_table(head_to_head_df, 'head_to_head_pairs', sort_by='head_to_head_wins',
+                    search=['driver1_name', 'driver2_name'])
 
     # Dropdowns to compare any two drivers
-    driver_list = drivers.apply(lambda row: f"{row['forename']} {row['surname']}", axis=1).tolist()
-    driver1 = st.selectbox("Select First Driver", driver_list, index=0, key='asdfasdf')
-    driver2 = st.selectbox("Select Second Driver", driver_list, index=1, key='adsedg')
-
-    # Get driver IDs
-    driver1_id = drivers.loc[drivers['forename'] + ' ' + drivers['surname'] == driver1, 'driverId'].values[0]
-    driver2_id = drivers.loc[drivers['forename'] + ' ' + drivers['surname'] == driver2, 'driverId'].values[0]
+    drivers_by_id = driver_index(drivers)
+    driver1_id, driver1 = select_entity("Select First Driver", drivers_by_id, default=0, key='asdfasdf')
+    driver2_id, driver2 = select_entity("Select Second Driver", drivers_by_id, default=1, key='adsedg')
 
-    # Filter head-to-head data
-    comparison = head_to_head_df[((head_to_head_df['driver1'] == driver1_id) & (head_to_head_df['driver2'] == driver2_id)) | 
-                                  ((head_to_head_df['driver1'] == driver2_id) & (head_to_head_df['driver2'] == driver1_id))]
+    # Look the pair up in the rivalry index instead of filtering every pair
+    index = rivalry_index(results, race_ids)
+    driver1_wins, driver2_wins, shared_races = index.record(driver1_id, driver2_id)
 
-    if not comparison.empty:
+    if shared_races:
         st.write(f"Head-to-Head Record between {driver1} and {driver2}:")
-        st.dataframe(comparison)
+        st.dataframe(pd.DataFrame({
+            'driver': [driver1, driver2],
+            'head_to_head_wins': [driver1_wins, driver2_wins],
+            'shared_races': [shared_races, shared_races],
+        }))
+
+        st.write("Race-by-race timeline:")
+        timeline = index.timeline(driver1_id, driver2_id).merge(
+            races[['raceId', 'year', 'name']], on='raceId', how='left')
+        timeline['ahead'] = timeline['ahead'].map({driver1_id: driver1, driver2_id: driver2})
+        st.dataframe(timeline[['year', 'name', 'ahead']])
     else:
         st.write(f"No direct head-to-head data available for {driver1} and {driver2}.")
@@ -1,25 +1,42 @@
-import pandas as pd
 import streamlit as st
-import matplotlib.pyplot as plt
-import seaborn as sns
-from utils.data_loader import load_all_data
-
-# Load all datasets
-data_directory = 'data'  # Adjust the path as necessary
-data = load_all_data(data_directory)
-
-lap_times = data['lap_times']
-races = data['races']
-
-def run(lap_times, races):
+from utils.lap_stats import circuit_aggregates, summarize
+
+def race_lap_times(lap_time_stats, races):
+    """Average lap time (s) of every race, with the race name."""
+    race_summary = summarize(lap_time_stats).rename(columns={'mean_sec': 'lap_time_sec'})
+    circuit_avg = race_summary['lap_time_sec'].reset_index()
+    return circuit_avg.merge(races[['raceId', 'name']], on='raceId')
+
+def circuit_lap_times(lap_time_stats, races):
+    """Whole-history statistics per circuit, rolled up from the per-race aggregates."""
+    circuit_summary = summarize(circuit_aggregates(lap_time_stats, races))
+    circuit_names = races.drop_duplicates('circuitId', keep='last').set_index('circuitId')['name']
+    circuit_summary.insert(0, 'name', circuit_summary.index.map(circuit_names))
+    return circuit_summary.sort_values(by='mean_sec')
+
+def warmup(lap_time_stats, races):
+    """Background precomputation for utils.warmup."""
+    circuit_aggregates(lap_time_stats, races)
+
+def report(lap_time_stats, races):
+    """Headless version of the page for batch_report."""
+    if lap_time_stats.empty:
+        return {}
+    return {'tables': {
+        'race_lap_times': race_lap_times(lap_time_stats, races).sort_values(by='lap_time_sec'),
+        'circuit_lap_times': circuit_lap_times(lap_time_stats, races).reset_index(),
+    }}
+
+def run(lap_time_stats, races):
+    """Renders lap time statistics from the streamed per-race aggregates (see utils.lap_stats)."""
     st.title("Lap Time Efficiency Analysis")
 
-    # Calculate average lap time by circuit
-    lap_times['lap_time_sec'] = lap_times['milliseconds'] / 1000
-    circuit_avg = lap_times.groupby('raceId')['lap_time_sec'].mean().reset_index()
+    if lap_time_stats.empty:
+        st.write("No lap time data available for analysis.")
+        return
 
-    # Merge with race names
-    circuit_avg = circuit_avg.merge(races[['raceId', 'name']], on='raceId')
+    # Calculate average lap time by circuit
+    circuit_avg = race_lap_times(lap_time_stats, races)
 
     # Display average lap time by circuit
     st.subheader("Average Lap Time by Circuit")
@@ -29,3 +46,6 @@ def run(lap_times, races):
     st.subheader("Detailed Statistics")
     st.write(circuit_avg[['name', 'lap_time_sec']].sort_values(by='lap_time_sec'))
 
+    # Whole-history statistics per circuit, rolled up from the per-race aggregates
+    st.subheader("Lap Time Statistics per Circuit")
+    st.write(circuit_lap_times(lap_time_stats, races))
@@ -1,55 +1,125 @@
 import streamlit as st
 import pandas as pd
-import seaborn as sns
 import matplotlib.pyplot as plt
 import numpy as np
 from utils.data_loader import load_all_data
-from sklearn.ensemble import RandomForestRegressor
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import mean_squared_error, r2_score
+from utils.memo import memoize_frames
+from utils.training_scheduler import submit_fit
+from utils.figure_cache import show_figure
+from utils.profiling import phase
+
+# Hyperparameters of the finish-position model; part of its registry fingerprint
+MODEL_PARAMS = {'n_estimators': 100, 'random_state': 42, 'test_size': 0.2}
+
+@memoize_frames
+def pit_stop_summary(pit_stops):
+    """Pit stop count and total duration per driver per race."""
+    pit_stop_counts = pit_stops.groupby(['raceId', 'driverId']).size().reset_index(name='pit_stop_count')
+    pit_stop_durations = pit_stops.groupby(['raceId', 'driverId'])['milliseconds'].sum().reset_index(name='total_pit_time')
+    return pd.merge(pit_stop_counts, pit_stop_durations, on=['raceId', 'driverId'])
+
+@memoize_frames
+def modeling_data(pit_stops, results):
+    """Pit stop summary joined with finishing positions, with pit time in seconds."""
+    merged_data = pd.merge(pit_stop_summary(pit_stops), results[['raceId', 'driverId', 'positionOrder']], on=['raceId', 'driverId'])
+    merged_data = merged_data.dropna(subset=['positionOrder'])
+    merged_data['positionOrder'] = merged_data['positionOrder'].astype(int)
+    merged_data['total_pit_time_s'] = merged_data['total_pit_time'] / 1000
+    return merged_data
+
+def train_finish_model(merged_data, n_estimators, random_state, test_size):
+    """Fits the Random Forest and keeps its held-out predictions for the evaluation plot."""
+    from sklearn.ensemble import RandomForestRegressor
+    from sklearn.model_selection import train_test_split
+
+    X = merged_data[['pit_stop_count', 'total_pit_time_s']]
+    y = merged_data['positionOrder']
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=random_state)
+
+    model = RandomForestRegressor(n_estimators=n_estimators, random_state=random_state)
+    model.fit(X_train, y_train)
+    return {'model': model, 'y_test': y_test.to_numpy(), 'y_pred': model.predict(X_test)}
+
+def draw_counts(pit_analysis):
+    import seaborn as sns
+    fig1, ax1 = plt.subplots()
+    sns.histplot(pit_analysis['pit_stop_count'], bins=range(1, pit_analysis['pit_stop_count'].max() + 2), ax=ax1)
+    ax1.set_title("Distribution of Pit Stop Counts")
+    ax1.set_xlabel("Number of Pit Stops")
+    return fig1
+
+def draw_durations(pit_analysis):
+    import seaborn as sns
+    fig2, ax2 = plt.subplots()
+    sns.histplot(pit_analysis['total_pit_time'] / 1000, bins=30, kde=True, ax=ax2)
+    ax2.set_title("Distribution of Total Pit Stop Durations (s)")
+    ax2.set_xlabel("Total Pit Stop Duration (s)")
+    return fig2
+
+def draw_evaluation(y_test, y_pred, y):
+    fig3, ax3 = plt.subplots(figsize=(8,6))
+    ax3.scatter(y_test, y_pred, alpha=0.7, color='teal')
+    ax3.plot([y.min(), y.max()], [y.min(), y.max()], 'r--', lw=2)
+    ax3.set_xlabel("Actual Finish Position")
+    ax3.set_ylabel("Predicted Finish Position")
+    ax3.set_title("Actual vs Predicted Race Finish Position")
+    return fig3
+
+def evaluate(fitted):
+    """RMSE and R² of the held-out predictions."""
+    from sklearn.metrics import mean_squared_error, r2_score
+    mse = mean_squared_error(fitted['y_test'], fitted['y_pred'])
+    return np.sqrt(mse), r2_score(fitted['y_test'], fitted['y_pred'])
+
+def warmup(pit_stops, results):
+    """Background precomputation for utils.warmup; the model fit keeps running on its own pool."""
+    merged_data = modeling_data(pit_stops, results)
+    submit_fit('pit_stop_finish', train_finish_model, [merged_data], MODEL_PARAMS)
+
+def report(pit_stops, results):
+    """Headless version of the page for batch_report."""
+    merged_data = modeling_data(pit_stops, results)
+    fitted = submit_fit('pit_stop_finish', train_finish_model, [merged_data], MODEL_PARAMS).result()
+    pit_analysis = pit_stop_summary(pit_stops)
+    rmse, r2 = evaluate(fitted)
+    y = merged_data['positionOrder']
+    return {
+        'tables': {'pit_stop_summary': pit_analysis},
+        'figures': {
+            'pit_stop_counts': lambda: draw_counts(pit_analysis),
+            'pit_stop_durations': lambda: draw_durations(pit_analysis),
+            'finish_model_evaluation': lambda: draw_evaluation(fitted['y_test'], fitted['y_pred'], y),
+        },
+        'metrics': {'finish_model_rmse': rmse, 'finish_model_r2': r2, 'finish_model_params': MODEL_PARAMS},
+    }
 
 def run(pit_stops, results):
     st.title("Pit Stop Strategies Analysis & Predictive Modeling")
 
+    # Start (or reuse) the model fit in the background while the charts render
+    merged_data = modeling_data(pit_stops, results)
+    fit = submit_fit('pit_stop_finish', train_finish_model, [merged_data], MODEL_PARAMS)
+
     # ---------------------------
     # Pit Stop Analysis
     # ---------------------------
     # Compute pit stop counts and total durations per driver per race
-    pit_stop_counts = pit_stops.groupby(['raceId', 'driverId']).size().reset_index(name='pit_stop_count')
-    pit_stop_durations = pit_stops.groupby(['raceId', 'driverId'])['milliseconds'].sum().reset_index(name='total_pit_time')
-    
-    # Merge counts and durations
-    pit_analysis = pd.merge(pit_stop_counts, pit_stop_durations, on=['raceId', 'driverId'])
+    pit_analysis = pit_stop_summary(pit_stops)
     
     # Visualize pit stop count distribution
     st.subheader("Distribution of Pit Stop Counts per Race")
-    fig1, ax1 = plt.subplots()
-    sns.histplot(pit_analysis['pit_stop_count'], bins=range(1, pit_analysis['pit_stop_count'].max() + 2), ax=ax1)
-    ax1.set_title("Distribution of Pit Stop Counts")
-    ax1.set_xlabel("Number of Pit Stops")
-    st.pyplot(fig1)
+    show_figure('pit_stop_counts', {}, [pit_stops], lambda: draw_counts(pit_analysis))
     
     # Visualize total pit stop durations distribution (convert ms to seconds)
     st.subheader("Distribution of Total Pit Stop Durations (s)")
-    fig2, ax2 = plt.subplots()
-    sns.histplot(pit_analysis['total_pit_time'] / 1000, bins=30, kde=True, ax=ax2)
-    ax2.set_title("Distribution of Total Pit Stop Durations (s)")
-    ax2.set_xlabel("Total Pit Stop Duration (s)")
-    st.pyplot(fig2)
+    show_figure('pit_stop_durations', {}, [pit_stops], lambda: draw_durations(pit_analysis))
     
     # ---------------------------
     # Merge with Race Results for Predictive Modeling
     # ---------------------------
-    # Merge pit stop analysis with race results to get finishing position (assumed to be in 'positionOrder')
-    merged_data = pd.merge(pit_analysis, results[['raceId', 'driverId', 'positionOrder']], on=['raceId', 'driverId'])
-    merged_data = merged_data.dropna(subset=['positionOrder'])
-    merged_data['positionOrder'] = merged_data['positionOrder'].astype(int)
-    
+    # Pit stop analysis merged with race results to get finishing position (assumed to be in 'positionOrder')
     st.subheader("Merged Pit Stop and Race Performance Data")
-    st.write(merged_data.head())
-    
-    # Convert pit stop total time from ms to seconds for modeling
-    merged_data['total_pit_time_s'] = merged_data['total_pit_time'] / 1000
+    st.write(merged_data.drop(columns='total_pit_time_s').head())
     
     # ---------------------------
     # Predictive Modeling: Race Finish Position
@@ -57,34 +127,25 @@ def run(pit_stops, results):
     st.subheader("Predicting Race Finish Position Based on Pit Stop Strategy")
     st.write("A Random Forest model is trained to predict the finishing position from pit stop count and total pit stop duration (in seconds).")
     
-    # Define features and target
-    X = merged_data[['pit_stop_count', 'total_pit_time_s']]
+    # The registry reuses the stored model unless the training data or hyperparameters changed
+    status = st.empty()
+    if not fit.done():
+        status.info("Model warming up... results appear as soon as training finishes.")
+    with phase('fit'):
+        fitted = fit.result()
+    status.empty()
+    model, y_test, y_pred = fitted['model'], fitted['y_test'], fitted['y_pred']
     y = merged_data['positionOrder']
     
-    # Split the data into training and testing sets
-    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
-    
-    # Train the Random Forest Regressor
-    model = RandomForestRegressor(n_estimators=100, random_state=42)
-    model.fit(X_train, y_train)
-    
     # Evaluate the model
-    y_pred = model.predict(X_test)
-    mse = mean_squared_error(y_test, y_pred)
-    rmse = np.sqrt(mse)
-    r2 = r2_score(y_test, y_pred)
+    rmse, r2 = evaluate(fitted)
     
     st.write(f"**RMSE:** {rmse:.2f}")
     st.write(f"**R-squared:** {r2:.2f}")
     
     # Plot Actual vs Predicted Finish Positions
-    fig3, ax3 = plt.subplots(figsize=(8,6))
-    ax3.scatter(y_test, y_pred, alpha=0.7, color='teal')
-    ax3.plot([y.min(), y.max()], [y.min(), y.max()], 'r--', lw=2)
-    ax3.set_xlabel("Actual Finish Position")
-    ax3.set_ylabel("Predicted Finish Position")
-    ax3.set_title("Actual vs Predicted Race Finish Position")
-    st.pyplot(fig3)
+    show_figure('pit_stop_evaluation', MODEL_PARAMS, [pit_stops, results],
+                lambda: draw_evaluation(y_test, y_pred, y))
     
     # ---------------------------
     # Interactive Prediction
@@ -2,26 +2,63 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.linear_model import LinearRegression
-from sklearn.metrics import r2_score, mean_squared_error
 from utils.data_loader import load_all_data
+from utils.entity_index import driver_index, select_entity
+from utils.partition_index import rows_for
+from utils.trend_fit import grouped_linear_fit
+from utils.profiling import phase
+from utils.figure_cache import show_figure
+from utils.memo import memoize_frames
 
-def run(qualifying, results, drivers):
+def _positions(qualifying, results):
+    """Qualifying and finishing position of every driver in every race they did both."""
+    merged = pd.merge(qualifying[['raceId', 'driverId', 'position']],
+                      results[['raceId', 'driverId', 'positionOrder']], on=['raceId', 'driverId'])
+    return merged.dropna(subset=['position', 'positionOrder']).astype({'position': 'float64', 'positionOrder': 'float64'})
+
+@memoize_frames
+def qualifying_fits(qualifying, results, drivers, min_races=5):
+    """The page's correlation and regression for every driver with at least min_races data points."""
+    return _fits(_positions(qualifying, results), drivers, min_races)
+
+def _fits(merged, drivers, min_races=5):
+    fit = grouped_linear_fit(merged, 'driverId', x='position', y='positionOrder')
+    # Pearson correlation from grouped moments; NaN where either position never varies
+    x, y = merged['position'], merged['positionOrder']
+    moments = pd.DataFrame({'driverId': merged['driverId'], 'x': x, 'y': y, 'xy': x * y, 'xx': x * x, 'yy': y * y})
+    means = moments.groupby('driverId').mean()
+    cov = means['xy'] - means['x'] * means['y']
+    var_x, var_y = means['xx'] - means['x'] ** 2, means['yy'] - means['y'] ** 2
+    corr = cov / np.sqrt(var_x * var_y).where((var_x > 1e-9) & (var_y > 1e-9))
+    fits = pd.DataFrame({
+        'races': fit['n'],
+        'correlation': corr,
+        'coefficient': fit['slope'],
+        'intercept': fit['intercept'],
+        'r_squared': corr ** 2,  # Single-feature least squares: R² is the squared correlation
+    })
+    fits = fits[fits['races'] >= min_races]
+    fits.insert(0, 'driver', fits.index.map(driver_index(drivers).names))
+    return fits.reset_index()
+
+def report(qualifying, results, drivers):
+    """Headless version of the page for batch_report; covers every driver instead of one."""
+    return {'tables': {'driver_fits': qualifying_fits(qualifying, results, drivers)}}
+
+def run(qualifying, results, drivers, store=None):
     st.title("Qualifying vs Race Performance Analysis (Per Driver)")
 
-    # Create a mapping of full driver name to driverId
-    driver_mapping = {
-        f"{row['forename']} {row['surname']}": row['driverId']
-        for _, row in drivers.iterrows()
-    }
     # Allow the user to select a driver by name
-    selected_driver_name = st.selectbox("Select a Driver", list(driver_mapping.keys()))
-    selected_driver_id = driver_mapping[selected_driver_name]
+    selected_driver_id, selected_driver_name = select_entity(
+        "Select a Driver", driver_index(drivers), key='qualifying_vs_race_driver')
 
     # Filter qualifying and race data for the selected driver
-    qualifying_driver = qualifying[qualifying['driverId'] == selected_driver_id]
-    results_driver = results[results['driverId'] == selected_driver_id]
+    if store is not None:
+        qualifying_driver = store.select('qualifying', driverId=selected_driver_id)
+        results_driver = store.select('results', ['raceId', 'driverId', 'positionOrder'], driverId=selected_driver_id)
+    else:
+        qualifying_driver = rows_for(qualifying, 'driverId', selected_driver_id)
+        results_driver = rows_for(results, 'driverId', selected_driver_id)
 
     # Check if sufficient data is available
     if qualifying_driver.empty or results_driver.empty:
@@ -54,27 +91,29 @@ def run(qualifying, results, drivers):
         st.warning("Not enough data points for a reliable analysis.")
         return
 
-    # Calculate correlation between qualifying and race finish positions
-    corr = merged['position'].corr(merged['positionOrder'])
-    st.write(f"**Correlation** between qualifying position and race finish position: **{corr:.2f}**")
+    # Correlation and regression line come from the same per-driver fits as the report
+    with phase('fit'):
+        if store is not None:
+            fit = _fits(_positions(qualifying_driver, results_driver), drivers)
+        else:
+            fit = rows_for(qualifying_fits(qualifying, results, drivers), 'driverId', selected_driver_id)
+    if fit.empty:
+        st.warning("Not enough data points for a reliable analysis.")
+        return
+    fit = fit.iloc[0]
+    st.write(f"**Correlation** between qualifying position and race finish position: **{fit['correlation']:.2f}**")
 
     # -----------------------------
     # Predictive Modeling with Linear Regression
     # -----------------------------
-    X = merged[['position']].values  # Qualifying positions as features
     y = merged['positionOrder'].values  # Race finish positions as target
-
-    model = LinearRegression()
-    model.fit(X, y)
-    y_pred = model.predict(X)
-    
-    r2 = r2_score(y, y_pred)
-    rmse = np.sqrt(mean_squared_error(y, y_pred))
+    y_pred = fit['intercept'] + fit['coefficient'] * merged['position'].values
+    rmse = np.sqrt(np.mean((y - y_pred) ** 2))
     
     st.subheader("Predictive Model: Linear Regression")
-    st.write(f"**Coefficient:** {model.coef_[0]:.2f}")
-    st.write(f"**Intercept:** {model.intercept_:.2f}")
-    st.write(f"**R-squared:** {r2:.2f}")
+    st.write(f"**Coefficient:** {fit['coefficient']:.2f}")
+    st.write(f"**Intercept:** {fit['intercept']:.2f}")
+    st.write(f"**R-squared:** {fit['r_squared']:.2f}")
     st.write(f"**RMSE:** {rmse:.2f}")
 
     # -----------------------------
@@ -83,26 +122,32 @@ def run(qualifying, results, drivers):
     st.subheader("Qualifying vs Race Finish Position")
     st.write("The red line indicates the regression line (predicted race finish position).")
     
-    fig, ax = plt.subplots(figsize=(8, 6))
-    sns.scatterplot(x='position', y='positionOrder', data=merged, ax=ax, color='blue', label="Actual Data")
-    sns.lineplot(x=merged['position'], y=y_pred, color='red', ax=ax, label="Regression Line")
-    ax.set_xlabel("Qualifying Position")
-    ax.set_ylabel("Race Finish Position")
-    ax.set_title(f"Qualifying vs Race Finish Position for {selected_driver_name}")
-    st.pyplot(fig)
+    def draw_scatter():
+        import seaborn as sns
+        fig, ax = plt.subplots(figsize=(8, 6))
+        sns.scatterplot(x='position', y='positionOrder', data=merged, ax=ax, color='blue', label="Actual Data")
+        sns.lineplot(x=merged['position'], y=y_pred, color='red', ax=ax, label="Regression Line")
+        ax.set_xlabel("Qualifying Position")
+        ax.set_ylabel("Race Finish Position")
+        ax.set_title(f"Qualifying vs Race Finish Position for {selected_driver_name}")
+        return fig
+    show_figure('qualifying_vs_race_scatter', {'driver': selected_driver_id}, [merged], draw_scatter)
 
     # -----------------------------
     # Visualization: Residual Plot
     # -----------------------------
     st.subheader("Residual Analysis")
     residuals = y - y_pred
-    fig2, ax2 = plt.subplots(figsize=(8, 6))
-    sns.scatterplot(x=y_pred, y=residuals, ax=ax2, color='purple')
-    ax2.axhline(0, color='red', linestyle='--')
-    ax2.set_xlabel("Predicted Race Finish Position")
-    ax2.set_ylabel("Residuals")
-    ax2.set_title("Residuals vs Predicted Values")
-    st.pyplot(fig2)
+    def draw_residuals():
+        import seaborn as sns
+        fig2, ax2 = plt.subplots(figsize=(8, 6))
+        sns.scatterplot(x=y_pred, y=residuals, ax=ax2, color='purple')
+        ax2.axhline(0, color='red', linestyle='--')
+        ax2.set_xlabel("Predicted Race Finish Position")
+        ax2.set_ylabel("Residuals")
+        ax2.set_title("Residuals vs Predicted Values")
+        return fig2
+    show_figure('qualifying_vs_race_residuals', {'driver': selected_driver_id}, [merged], draw_residuals)
 
     # -----------------------------
     # Interactive Prediction for the Selected Driver
@@ -110,7 +155,7 @@ def run(qualifying, results, drivers):
     st.subheader("Interactive Prediction")
     st.write("Enter a qualifying position to predict the race finish position for the selected driver.")
     qual_input = st.number_input("Qualifying Position", min_value=1, max_value=50, value=10)
-    predicted_finish = model.predict(np.array([[qual_input]]))[0]
+    predicted_finish = fit['intercept'] + fit['coefficient'] * qual_input
     st.write(f"Predicted Race Finish Position for Qualifying Position {qual_input}: **{predicted_finish:.2f}**")
 
 if __name__ == "__main__":
@@ -1,28 +1,28 @@
 import streamlit as st
 import pandas as pd
-from utils.data_loader import load_all_data
+from utils.entity_index import constructor_index
 
-# Load all datasets
-data_directory = 'data'  # Adjust the path as necessary
-data = load_all_data(data_directory)
+# Analyze struggling teams
+def analyze_struggling_teams(results, constructors):
+    """Average finishing position of every constructor, worst first."""
+    team_finish = results.groupby('constructorId')['positionOrder'].mean()
+    team_finish = team_finish.rename(index=constructor_index(constructors).names)
+    return team_finish.sort_values(ascending=False)
 
-constructors = data['constructors']
-results = data['results']
+def report(results, constructors):
+    """Headless version of the page for batch_report."""
+    team_finish = analyze_struggling_teams(results, constructors)
+    return {
+        'tables': {'team_finish': team_finish.rename('average_finish').rename_axis('constructor').reset_index()},
+        'metrics': {'most_struggling_team': team_finish.index[0] if len(team_finish) else None},
+    }
 
 def run(results, constructors):
-    # Analyze struggling teams
-    def analyze_struggling_teams():
-        team_finish = results.groupby('constructorId')['positionOrder'].mean()
-        constructor_names = constructors.set_index('constructorId')['name']
-        team_finish = team_finish.rename(index=constructor_names)
-        struggling_team = team_finish.sort_values(ascending=False).head(1)
-        return struggling_team
-
     # Streamlit application layout
     st.title("Struggling Teams Analysis")
 
     if st.button("Analyze Struggling Teams"):
-        struggling_team = analyze_struggling_teams()
+        struggling_team = analyze_struggling_teams(results, constructors).head(1)
         st.write("Team most likely to underperform based on average finishing position:")
         st.write(struggling_team)
 
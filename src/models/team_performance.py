@@ -1,43 +1,63 @@
 import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
-from utils.data_loader import load_all_data
+from utils.entity_index import constructor_index, select_entity
+from utils.partition_index import rows_for
+from utils.figure_cache import show_figure
+from utils.memo import memoize_frames
+from utils.paged_table import paged_table
 
-data_directory = 'data'  # Adjust the path as necessary
-data = load_all_data(data_directory)
-races = data['races']
-constructors = data['constructors']
-results = data['results']
+@memoize_frames
+def constructor_summary(results, constructors):
+    """Average finishing position and number of entries of every constructor."""
+    summary = results.groupby('constructorId')['positionOrder'].agg(['mean', 'count'])
+    summary.columns = ['average_position', 'entries']
+    summary.insert(0, 'constructor', summary.index.map(constructor_index(constructors).names))
+    return summary.reset_index()
 
-def run(results, constructors):
+def report(results, constructors, races):
+    """Headless version of the page for batch_report; covers every constructor instead of one."""
+    return {'tables': {'constructors': constructor_summary(results, constructors)}}
+
+def run(results, constructors, races, store=None):
     st.title("F1 Team Performance Analysis")
 
     # Select a constructor for analysis
-    constructor_names = constructors['name'].tolist()
-    selected_constructor = st.selectbox("Select a Constructor", constructor_names)
+    constructor_id, selected_constructor = select_entity(
+        "Select a Constructor", constructor_index(constructors), key='team_performance_constructor')
 
-    # Filter results for the selected constructor
-    constructor_id = constructors[constructors['name'] == selected_constructor]['constructorId'].values[0]
-    constructor_results = results[results['constructorId'] == constructor_id]
+    if store is not None:
+        # Only this constructor's results, and its average computed by SQLite
+        constructor_results = store.select('results', ['raceId', 'positionOrder'], constructorId=constructor_id)
+        average = store.aggregate('results', 'constructorId', 'positionOrder', 'mean', constructorId=constructor_id)
+        average_position = average['positionOrder'].iloc[0] if not average.empty else float('nan')
+    else:
+        # Filter results for the selected constructor
+        constructor_results = rows_for(results, 'constructorId', constructor_id)
 
-    # Calculate average finishing position
-    average_position = constructor_results['positionOrder'].mean()
+        # Average finishing position, from the same per-constructor summary as the report
+        summary = rows_for(constructor_summary(results, constructors), 'constructorId', constructor_id)
+        average_position = summary['average_position'].iloc[0] if not summary.empty else float('nan')
     st.write(f"Average Finishing Position for {selected_constructor}: {average_position:.2f}")
     # Display results for each race
     st.subheader("Race Results")
     race_results = constructor_results[['raceId', 'positionOrder']].merge(
-        data['races'][['raceId', 'name']], on='raceId'
+        races[['raceId', 'name']], on='raceId'
     )
     race_results = race_results.rename(columns={'name': 'Race Name', 'positionOrder': 'Finishing Position'})
-    st.dataframe(race_results)
+    paged_table(race_results, 'team_performance_races', search=['Race Name'])
 
     # Visualize the performance
     st.subheader("Performance Over the Season")
-    plt.figure(figsize=(10, 5))
-    plt.plot(race_results['Race Name'], race_results['Finishing Position'], marker='o')
-    plt.xticks(rotation=45)
-    plt.title(f"{selected_constructor} Finishing Positions Over the Season")
-    plt.xlabel("Race")
-    plt.ylabel("Finishing Position")
-    plt.grid()
-    st.pyplot(plt)
+    def draw_positions():
+        # Own figure instead of the global pyplot state, which concurrent sessions share
+        fig, ax = plt.subplots(figsize=(10, 5))
+        ax.plot(race_results['Race Name'], race_results['Finishing Position'], marker='o')
+        ax.tick_params(axis='x', labelrotation=45)
+        ax.set_title(f"{selected_constructor} Finishing Positions Over the Season")
+        ax.set_xlabel("Race")
+        ax.set_ylabel("Finishing Position")
+        ax.grid()
+        return fig
+    show_figure('team_performance', {'constructor': constructor_id}, [constructor_results, races, constructors],
+                draw_positions)
@@ -1,41 +1,47 @@
 import streamlit as st
 import pandas as pd
-from utils.data_loader import load_all_data
-
-# Load all datasets
-data_directory = 'data'  # Adjust the path as necessary
-data = load_all_data(data_directory)
-
-results = data['results']
-races = data['races']
-drivers = data['drivers']
-
-def run(results, races, drivers):
+from utils.entity_index import driver_index, select_entity
+from utils.memo import memoize_frames
+from utils.paged_table import paged_table
+from utils.partition_index import rows_for
+
+@memoize_frames
+def driver_track_averages(results, races, drivers):
+    """Average finishing position of every driver at every track."""
+    return _track_averages(results, races, drivers)
+
+def _track_averages(results, races, drivers):
+    merged = pd.merge(results[['raceId', 'driverId', 'positionOrder']], races[['raceId', 'name']],
+                      on='raceId', how='left')
+    # observed=True: with the shared backend track names are categorical
+    averages = merged.groupby(['driverId', 'name'], observed=True)['positionOrder'].agg(['mean', 'count']).reset_index()
+    averages.columns = ['driverId', 'Track', 'Average Finish Position', 'Races']
+    averages.insert(1, 'Driver', averages['driverId'].map(driver_index(drivers).names))
+    return averages
+
+def report(results, races, drivers):
+    """Headless version of the page for batch_report; covers every driver instead of one."""
+    return {'tables': {'track_averages': driver_track_averages(results, races, drivers)}}
+
+def run(results, races, drivers, store=None):
     st.title("Driver Performance on Specific Tracks")
 
-    # Create a mapping from driver's full name to driverId
-    driver_options = {
-        f"{row['forename']} {row['surname']}": row['driverId']
-        for _, row in drivers.iterrows()
-    }
-    
     # Let the user select a driver by name
-    selected_driver_name = st.selectbox("Select a Driver", list(driver_options.keys()))
-    selected_driver_id = driver_options[selected_driver_name]
-
-    # Filter results for the selected driver
-    driver_results = results[results['driverId'] == selected_driver_id]
-
-    # Merge with races to get track names
-    driver_race_data = pd.merge(driver_results, races[['raceId', 'name']], on='raceId', how='left')
+    selected_driver_id, selected_driver_name = select_entity(
+        "Select a Driver", driver_index(drivers), key='track_struggles_driver')
 
-    # Calculate average finishing position by track
-    track_performance = driver_race_data.groupby('name')['positionOrder'].mean().reset_index()
-    track_performance.columns = ['Track', 'Average Finish Position']
+    # The selected driver's rows of the per-track averages the report is built from
+    if store is not None:
+        rows = store.select('results', ['raceId', 'driverId', 'positionOrder'], driverId=selected_driver_id)
+        averages = _track_averages(rows, races, drivers)
+    else:
+        averages = rows_for(driver_track_averages(results, races, drivers), 'driverId', selected_driver_id)
+    track_performance = averages[['Track', 'Average Finish Position', 'Races']].reset_index(drop=True)
 
     # Display the results
     st.subheader(f"Performance of {selected_driver_name} on Tracks")
-    st.write(track_performance)
+    # Worst tracks first
+    paged_table(track_performance, 'track_struggles_tracks', sort_by='Average Finish Position', search=['Track'])
 
     # Visualize the performance as a bar chart
     st.bar_chart(track_performance.set_index('Track')['Average Finish Position'])
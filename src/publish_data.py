@@ -0,0 +1,58 @@
+"""Publishes the cleaned tables as a memory-mapped snapshot that every app worker attaches to.
+
+    python publish_data.py --data data              # publish once
+    python publish_data.py --data data --watch 30   # republish whenever a CSV changes
+
+Workers started with F1_BACKEND=shared map the published column files read-only instead of each
+parsing and holding its own copy, so the numeric data is in memory once for all of them. A
+refresh is one publish: workers pick up the new snapshot on their next rerun, re-reading only the
+tables that changed (and extending what they derived from tables that only grew).
+"""
+import argparse
+import sys
+import time
+from utils.data_loader import DATASETS, file_signature
+from utils.data_plane import dataset_loaders, plane_directory, publish
+from utils.data_store import DERIVED_SOURCES, DERIVED_TABLES
+
+def sources_signature(data_directory):
+    signature = {}
+    for name, file_name in DATASETS.items():
+        try:
+            signature[name] = file_signature(f"{data_directory}/{file_name}")
+        except OSError:
+            signature[name] = None
+    return signature
+
+def publish_once(data_directory, directory):
+    derived = {name: (DERIVED_SOURCES[name][0], build) for name, build in DERIVED_TABLES.items()}
+    start = time.perf_counter()
+    manifest = publish(data_directory, dataset_loaders(data_directory, derived), directory)
+    print(f"Snapshot v{manifest['version']} ({len(manifest['tables'])} tables) at {directory} "
+          f"in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return manifest
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish the datasets for F1_BACKEND=shared workers.")
+    parser.add_argument('--data', default='data', help="Directory with the Ergast CSV files")
+    parser.add_argument('--plane', help="Snapshot directory (default: F1_PLANE_DIR or <data>/.cache/plane)")
+    parser.add_argument('--watch', type=float, metavar='SECONDS',
+                        help="Keep running and republish when a CSV changes, checking this often")
+    args = parser.parse_args(argv)
+
+    directory = args.plane or plane_directory(args.data)
+    if not publish_once(args.data, directory)['tables']:
+        print(f"No datasets found in {args.data}", file=sys.stderr)
+        return 1
+    if args.watch:
+        signature = sources_signature(args.data)
+        while True:
+            time.sleep(args.watch)
+            current = sources_signature(args.data)
+            if current != signature:
+                signature = current
+                publish_once(args.data, directory)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
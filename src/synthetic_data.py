@@ -0,0 +1,415 @@
+"""Seeded generator of synthetic F1 history in the Ergast CSV layout, for scale testing.
+
+    python synthetic_data.py --out data_synthetic                 # ~75 seasons, like the real dump
+    python synthetic_data.py --out data_x10 --scale 10 --seed 7   # 10x the seasons (races, drivers)
+    F1_DATA_DIR=data_x10 streamlit run main.py
+
+Every table in utils.data_loader.DATASETS is written, with consistent ids across them. Each
+season, constructors have a car strength that drifts from year to year and drivers a skill.
+Seats change hands through retirements, releases and returning drivers, so careers span
+several teams. Every race is simulated lap by lap, and results, lap times, pit stops,
+qualifying and the running standings are all derived from the same simulation. The same
+seed always produces the same files.
+"""
+import argparse
+import os
+import sys
+import numpy as np
+import pandas as pd
+from utils.data_loader import DATASETS
+
+FORENAMES = ['Alex', 'Bruno', 'Carlos', 'Daniel', 'Emil', 'Felipe', 'George', 'Hans', 'Ivan', 'Jack',
+             'Kevin', 'Lucas', 'Marco', 'Nico', 'Oscar', 'Pierre', 'Rafael', 'Sergio', 'Tomas', 'Valtteri',
+             'Yuki', 'Zhou', 'Juan', 'Jim', 'Graham', 'Jochen', 'Niki', 'Alain', 'Ayrton', 'Mika']
+SURNAMES = ['Albers', 'Bianchi', 'Costa', 'Dubois', 'Eriksson', 'Fischer', 'Garcia', 'Hartley', 'Ito',
+            'Jensen', 'Kowalski', 'Lambert', 'Moreau', 'Novak', 'Olsen', 'Petrov', 'Quinn', 'Rossi',
+            'Schmidt', 'Tanaka', 'Urban', 'Varga', 'Weber', 'Young', 'Zanetti', 'Brooks', 'Clark',
+            'Hill', 'Lauda', 'Prost', 'Senna', 'Stewart', 'Villeneuve', 'Berger', 'Alesi', 'Button']
+NATIONALITIES = ['British', 'German', 'Italian', 'French', 'Brazilian', 'Finnish', 'Spanish',
+                 'Australian', 'Japanese', 'American', 'Dutch', 'Austrian', 'Mexican', 'Swiss', 'Belgian']
+TEAM_WORDS = ['Apex', 'Falcon', 'Meridian', 'Vortex', 'Crown', 'Summit', 'Arrow', 'Titan', 'Nova',
+              'Orbit', 'Phoenix', 'Raven', 'Sterling', 'Velocity', 'Zenith', 'Comet', 'Griffin', 'Atlas']
+TEAM_SUFFIXES = ['Racing', 'Motorsport', 'Engineering', 'Grand Prix', 'F1 Team']
+COUNTRIES = ['Australian', 'Bahrain', 'Chinese', 'Spanish', 'Monaco', 'Canadian', 'French', 'Austrian',
+             'British', 'Hungarian', 'Belgian', 'Italian', 'Singapore', 'Japanese', 'United States',
+             'Mexican', 'Brazilian', 'Abu Dhabi', 'Dutch', 'Portuguese', 'German', 'Malaysian', 'Turkish',
+             'Russian', 'Korean', 'Indian', 'European', 'San Marino', 'Argentine', 'South African']
+
+POINTS = np.array([25, 18, 15, 12, 10, 8, 6, 4, 2, 1], dtype=float)
+FINISHED_STATUS = 1
+RETIRED_STATUSES = np.array([3, 4, 5, 6, 7, 8, 9, 10, 20, 22, 23, 130])
+RACE_START_MS = 14 * 3600 * 1000  # Races start at 14:00 local time
+
+def _clock_text(ms):
+    """'H:MM:SS.mmm' for race times (NaN stays missing)."""
+    ms = pd.Series(ms, dtype='float64')
+    v = ms.dropna().astype('int64')
+    text = ((v // 3600000).astype(str) + ':' + ((v % 3600000) // 60000).astype(str).str.zfill(2) + ':'
+            + ((v % 60000) // 1000).astype(str).str.zfill(2) + '.' + (v % 1000).astype(str).str.zfill(3))
+    return text.reindex(ms.index)
+
+def _lap_text(ms):
+    """'M:SS.mmm' for lap and qualifying times (NaN stays missing)."""
+    ms = pd.Series(ms, dtype='float64')
+    v = ms.dropna().astype('int64')
+    text = ((v // 60000).astype(str) + ':' + ((v % 60000) // 1000).astype(str).str.zfill(2) + '.'
+            + (v % 1000).astype(str).str.zfill(3))
+    return text.reindex(ms.index)
+
+def _seconds_text(ms):
+    """'SS.mmm' for pit stop durations and gaps."""
+    v = pd.Series(ms, dtype='int64')
+    return (v // 1000).astype(str) + '.' + (v % 1000).astype(str).str.zfill(3)
+
+class _History:
+    """Drivers, constructors and circuits created while the seasons are simulated."""
+
+    def __init__(self, rng, n_circuits):
+        self.rng = rng
+        self.drivers = []        # dicts, driverId = position + 1
+        self.skill = []
+        self.birth_year = []
+        self.constructors = []   # dicts, constructorId = position + 1
+        self.strength = []
+        self.circuits = pd.DataFrame({
+            'circuitId': np.arange(1, n_circuits + 1),
+            'country': [COUNTRIES[i % len(COUNTRIES)] + ('' if i < len(COUNTRIES) else f" {i // len(COUNTRIES) + 1}")
+                        for i in range(n_circuits)],
+            'base_lap_ms': rng.uniform(72000, 105000, n_circuits),
+            'length_km': rng.uniform(3.3, 7.0, n_circuits),
+        })
+
+    def new_driver(self, year):
+        rng = self.rng
+        driver_id = len(self.drivers) + 1
+        forename, surname = rng.choice(FORENAMES), rng.choice(SURNAMES)
+        birth_year = year - int(round(19 + rng.gamma(2.0, 1.5)))
+        self.drivers.append({
+            'driverId': driver_id,
+            'driverRef': f"{surname.lower()}_{driver_id}",
+            'number': int(rng.integers(2, 100)) if rng.random() < 0.5 else None,
+            'code': surname[:3].upper(),
+            'forename': forename,
+            'surname': surname,
+            'dob': f"{birth_year}-{rng.integers(1, 13):02d}-{rng.integers(1, 29):02d}",
+            'nationality': rng.choice(NATIONALITIES),
+            'url': f"http://example.com/drivers/{driver_id}",
+        })
+        self.skill.append(rng.normal(0, 0.6))
+        self.birth_year.append(birth_year)
+        return driver_id
+
+    def new_constructor(self):
+        rng = self.rng
+        constructor_id = len(self.constructors) + 1
+        name = f"{rng.choice(TEAM_WORDS)} {rng.choice(TEAM_SUFFIXES)}"
+        if any(c['name'] == name for c in self.constructors):
+            name = f"{name} {constructor_id}"
+        self.constructors.append({
+            'constructorId': constructor_id,
+            'constructorRef': name.lower().replace(' ', '_'),
+            'name': name,
+            'nationality': rng.choice(NATIONALITIES),
+            'url': f"http://example.com/constructors/{constructor_id}",
+        })
+        self.strength.append(rng.normal(-0.3, 1.0))
+        return constructor_id
+
+def _simulate_race(rng, race_id, drivers, constructors, pace, circuit, laps, retire_rate):
+    """One race from the lights to the flag; returns the per-race frames."""
+    field = len(drivers)
+    base = circuit['base_lap_ms']
+
+    # Qualifying sets the grid
+    quali_ms = base * 0.98 - pace * 400 + rng.normal(0, 350, field)
+    quali_order = np.argsort(quali_ms)
+    grid = np.empty(field, dtype=int)
+    grid[quali_order] = np.arange(1, field + 1)
+
+    # Lap by lap: pace, noise, a slow first lap from further back and the pit stops
+    lap_ms = base - pace[:, None] * 300 + rng.normal(0, 700, (field, laps))
+    lap_ms[:, 0] += 4000 + grid * 250
+    stops = []
+    for i in range(field):
+        n_stops = 1 + rng.binomial(2, 0.35)
+        stop_laps = np.sort(rng.choice(np.arange(3, max(laps - 2, 4)), size=min(n_stops, max(laps - 5, 1)), replace=False))
+        durations = np.round(19000 + rng.gamma(2.0, 1500, len(stop_laps))).astype(np.int64)
+        lap_ms[i, stop_laps - 1] += durations
+        for stop, (lap, duration) in enumerate(zip(stop_laps, durations), start=1):
+            stops.append((i, stop, lap, duration))
+    lap_ms = np.round(lap_ms).astype(np.int64)
+
+    retired = rng.random(field) < retire_rate
+    laps_done = np.where(retired, rng.integers(0, laps, field), laps)
+    running = np.arange(laps)[None, :] < laps_done[:, None]
+    elapsed = np.where(running, np.cumsum(lap_ms, axis=1), np.iinfo(np.int64).max)
+    lap_position = np.argsort(np.argsort(elapsed, axis=0, kind='stable'), axis=0) + 1
+
+    # Classification: finishers by time, then retirements by distance covered
+    last_elapsed = np.where(laps_done > 0, elapsed[np.arange(field), np.maximum(laps_done - 1, 0)], 0)
+    order = np.lexsort((last_elapsed, -laps_done, retired))
+    position_order = np.empty(field, dtype=int)
+    position_order[order] = np.arange(1, field + 1)
+    total_ms = np.where(retired, np.nan, last_elapsed)
+    winner_ms = total_ms[order[0]]
+
+    fastest_lap = np.where(laps_done > 0, np.argmin(np.where(running, lap_ms, np.iinfo(np.int64).max), axis=1) + 1, 0)
+    fastest_ms = np.where(laps_done > 0, lap_ms[np.arange(field), np.maximum(fastest_lap - 1, 0)], np.nan)
+    fastest_rank = pd.Series(fastest_ms).rank(method='first').to_numpy()
+
+    results = pd.DataFrame({
+        'raceId': race_id,
+        'driverId': drivers,
+        'constructorId': constructors,
+        'grid': grid,
+        'position': pd.array(np.where(retired, -1, position_order), dtype='Int64'),
+        'positionText': np.where(retired, 'R', position_order.astype(str)),
+        'positionOrder': position_order,
+        'points': np.where(~retired & (position_order <= len(POINTS)),
+                           POINTS[np.minimum(position_order, len(POINTS)) - 1], 0.0),
+        'laps': laps_done,
+        'milliseconds': total_ms,
+        'gap_ms': total_ms - winner_ms,
+        'fastestLap': pd.array(np.where(laps_done > 0, fastest_lap, -1), dtype='Int64'),
+        'rank': pd.array(np.nan_to_num(fastest_rank, nan=-1).astype(int), dtype='Int64'),
+        'fastest_ms': fastest_ms,
+        'fastestLapSpeed': np.round(circuit['length_km'] * 3600000 / fastest_ms, 3),
+        'statusId': np.where(retired, rng.choice(RETIRED_STATUSES, field), FINISHED_STATUS),
+    })
+    for column in ['position', 'fastestLap', 'rank']:
+        results[column] = results[column].mask(results[column] < 0)
+    results = results.sort_values('positionOrder')
+
+    rows, columns = np.nonzero(running)
+    lap_times = pd.DataFrame({
+        'raceId': race_id,
+        'driverId': drivers[rows],
+        'lap': columns + 1,
+        'position': lap_position[rows, columns],
+        'milliseconds': lap_ms[rows, columns],
+    })
+
+    stops = [s for s in stops if s[2] <= laps_done[s[0]]]  # No stops after retiring
+    stop_index = np.array([s[0] for s in stops], dtype=int)
+    stop_laps = np.array([s[2] for s in stops], dtype=int)
+    pit_stops = pd.DataFrame({
+        'raceId': race_id,
+        'driverId': drivers[stop_index],
+        'stop': [s[1] for s in stops],
+        'lap': stop_laps,
+        'clock_ms': RACE_START_MS + (elapsed[stop_index, stop_laps - 1] if len(stops) else 0),
+        'milliseconds': [s[3] for s in stops],
+    })
+
+    quali = pd.DataFrame({
+        'raceId': race_id,
+        'driverId': drivers,
+        'constructorId': constructors,
+        'position': grid,
+        'q1_ms': np.round(quali_ms + 600),
+        'q2_ms': np.where(grid <= 15, np.round(quali_ms + 250), np.nan),
+        'q3_ms': np.where(grid <= 10, np.round(quali_ms), np.nan),
+    }).sort_values('position')
+    return results, lap_times, pit_stops, quali
+
+def _standings(race_id, totals, key):
+    """Running championship table after a race from {id: [points, wins]}."""
+    ids = np.array(list(totals), dtype=int)
+    points = np.array([totals[i][0] for i in ids], dtype=float)
+    wins = np.array([totals[i][1] for i in ids], dtype=int)
+    order = np.lexsort((ids, -wins, -points))
+    position = np.empty(len(ids), dtype=int)
+    position[order] = np.arange(1, len(ids) + 1)
+    return pd.DataFrame({'raceId': race_id, key: ids, 'points': points, 'position': position,
+                         'positionText': position.astype(str), 'wins': wins}).sort_values('position')
+
+def generate(seasons=75, rounds=20, field=20, laps=60, first_year=1950, seed=0, lap_sink=None):
+    """Simulates `seasons` seasons and returns a frame per DATASETS key, in the Ergast layout.
+
+    lap_sink, if given, is called with each season's lap times as soon as the season is
+    simulated, and lap_times is left out of the result; it is by far the largest table.
+    """
+    rng = np.random.default_rng(seed)
+    n_teams = max(field // 2, 1)
+    history = _History(rng, n_circuits=max(int(rounds * 1.5), len(COUNTRIES)))
+
+    teams = [history.new_constructor() for _ in range(n_teams)]
+    seats = np.array([[history.new_driver(first_year) for _ in range(2)] for _ in range(n_teams)])
+    free_agents = []
+
+    races, results, lap_times, pit_stops, qualifying = [], [], [], [], []
+    driver_standings, constructor_standings = [], []
+    race_id = 0
+    for season in range(seasons):
+        year = first_year + season
+        if season:
+            # Teams fold and are replaced; surviving cars drift in strength
+            for t in range(n_teams):
+                if rng.random() < 0.06:
+                    teams[t] = history.new_constructor()
+            # Drivers retire or are released; empty seats go to free agents or rookies
+            for t in range(n_teams):
+                for s in range(2):
+                    driver_id = seats[t, s]
+                    age = year - history.birth_year[driver_id - 1]
+                    if age >= 38 or rng.random() < 0.08:
+                        seats[t, s] = 0
+                    elif rng.random() < 0.18:
+                        free_agents.append(driver_id)
+                        seats[t, s] = 0
+            free_agents = [d for d in free_agents if d not in seats and year - history.birth_year[d - 1] < 36]
+            for t, s in zip(*np.nonzero(seats == 0)):
+                if free_agents and rng.random() < 0.6:
+                    seats[t, s] = free_agents.pop(int(rng.integers(len(free_agents))))
+                else:
+                    seats[t, s] = history.new_driver(year)
+        for constructor_id in teams:
+            history.strength[constructor_id - 1] = 0.75 * history.strength[constructor_id - 1] + rng.normal(0, 0.35)
+
+        drivers = seats.ravel().copy()
+        constructors = np.repeat(teams, 2)[:len(drivers)]
+        pace = (np.array(history.strength)[constructors - 1] + np.array(history.skill)[drivers - 1])
+        retire_rate = max(0.08, 0.4 - 0.005 * season)
+
+        calendar = rng.choice(len(history.circuits), size=min(rounds, len(history.circuits)), replace=False)
+        driver_totals, constructor_totals, season_laps = {}, {}, []
+        for round_number, circuit_index in enumerate(calendar, start=1):
+            race_id += 1
+            circuit = history.circuits.iloc[circuit_index]
+            date = pd.Timestamp(year, 3, 1) + pd.Timedelta(days=14 * (round_number - 1))
+            races.append({'raceId': race_id, 'year': year, 'round': round_number, 'circuitId': circuit['circuitId'],
+                          'name': f"{circuit['country']} Grand Prix", 'date': date.strftime('%Y-%m-%d'),
+                          'time': '14:00:00', 'url': f"http://example.com/races/{race_id}"})
+
+            race_results, race_laps, race_stops, race_quali = _simulate_race(
+                rng, race_id, drivers, constructors, pace, circuit, laps, retire_rate)
+            results.append(race_results)
+            season_laps.append(race_laps)
+            pit_stops.append(race_stops)
+            qualifying.append(race_quali)
+
+            for driver_id, constructor_id, points, order in race_results[
+                    ['driverId', 'constructorId', 'points', 'positionOrder']].itertuples(index=False):
+                win = int(order == 1)
+                driver_total = driver_totals.setdefault(driver_id, [0.0, 0])
+                driver_total[0] += points
+                driver_total[1] += win
+                constructor_total = constructor_totals.setdefault(constructor_id, [0.0, 0])
+                constructor_total[0] += points
+                constructor_total[1] += win
+            driver_standings.append(_standings(race_id, driver_totals, 'driverId'))
+            constructor_standings.append(_standings(race_id, constructor_totals, 'constructorId'))
+
+        season_laps = _lap_rows(season_laps)
+        if lap_sink is None:
+            lap_times.append(season_laps)
+        else:
+            lap_sink(season_laps)
+
+    return _ergast_tables(history, races, results, lap_times, pit_stops, qualifying,
+                          driver_standings, constructor_standings)
+
+def _lap_rows(race_laps):
+    """Concatenates per-race lap frames and adds the Ergast 'time' column."""
+    lap_times = pd.concat(race_laps, ignore_index=True)
+    lap_times.insert(4, 'time', _lap_text(lap_times['milliseconds']))
+    return lap_times
+
+def _ergast_tables(history, races, results, lap_times, pit_stops, qualifying, driver_standings, constructor_standings):
+    """Concatenates the per-race frames and formats them like the Ergast CSVs."""
+    drivers = pd.DataFrame(history.drivers)
+    drivers['number'] = drivers['number'].astype('Int64')
+    numbers = drivers.set_index('driverId')['number']
+
+    results = pd.concat(results, ignore_index=True)
+    results.insert(0, 'resultId', np.arange(1, len(results) + 1))
+    results.insert(4, 'number', results['driverId'].map(numbers).fillna(results['grid']).astype('int64'))
+    winner = results['gap_ms'] == 0
+    results['time'] = _clock_text(results['milliseconds']).where(winner, '+' + _seconds_text(
+        results['gap_ms'].fillna(0)).where(results['gap_ms'].notna()))
+    results['fastestLapTime'] = _lap_text(results['fastest_ms'])
+    results['milliseconds'] = results['milliseconds'].astype('Int64')
+    results = results[['resultId', 'raceId', 'driverId', 'constructorId', 'number', 'grid', 'position',
+                       'positionText', 'positionOrder', 'points', 'laps', 'time', 'milliseconds', 'fastestLap',
+                       'rank', 'fastestLapTime', 'fastestLapSpeed', 'statusId']]
+
+    races = pd.DataFrame(races)
+    for column in ['fp1_date', 'fp1_time', 'fp2_date', 'fp2_time', 'fp3_date', 'fp3_time',
+                   'quali_date', 'quali_time', 'sprint_date', 'sprint_time']:
+        races[column] = None
+
+    pit_stops = pd.concat(pit_stops, ignore_index=True)
+    clock = pd.to_datetime(pit_stops.pop('clock_ms'), unit='ms')
+    pit_stops.insert(4, 'time', clock.dt.strftime('%H:%M:%S'))
+    pit_stops.insert(5, 'duration', _seconds_text(pit_stops['milliseconds']))
+
+    qualifying = pd.concat(qualifying, ignore_index=True)
+    qualifying.insert(0, 'qualifyId', np.arange(1, len(qualifying) + 1))
+    qualifying.insert(4, 'number', qualifying['driverId'].map(numbers).fillna(qualifying['position']).astype('int64'))
+    for column in ['q1', 'q2', 'q3']:
+        qualifying[column] = _lap_text(qualifying.pop(f"{column}_ms"))
+
+    driver_standings = pd.concat(driver_standings, ignore_index=True)
+    driver_standings.insert(0, 'driverStandingsId', np.arange(1, len(driver_standings) + 1))
+    constructor_standings = pd.concat(constructor_standings, ignore_index=True)
+    constructor_standings.insert(0, 'constructorStandingsId', np.arange(1, len(constructor_standings) + 1))
+
+    tables = {
+        'drivers': drivers,
+        'constructors': pd.DataFrame(history.constructors),
+        'results': results,
+        'races': races,
+        'pit_stops': pit_stops,
+        'lap_times': pd.concat(lap_times, ignore_index=True) if lap_times else None,
+        'driver_standings': driver_standings,
+        'constructor_standings': constructor_standings,
+        'qualifying': qualifying,
+    }
+    return {key: df for key, df in tables.items() if df is not None}
+
+def write_tables(tables, data_directory):
+    """Writes the tables as the CSV files load_all_data reads, with '\\N' for missing values."""
+    os.makedirs(data_directory, exist_ok=True)
+    for key, df in tables.items():
+        df.to_csv(os.path.join(data_directory, DATASETS[key]), index=False, na_rep='\\N')
+
+def generate_to(data_directory, **kwargs):
+    """generate() straight into data_directory; returns the row count of every file written.
+
+    Lap times are appended to their CSV one season at a time, so memory stays flat however
+    many seasons are generated.
+    """
+    os.makedirs(data_directory, exist_ok=True)
+    lap_path = os.path.join(data_directory, DATASETS['lap_times'])
+    counts = {'lap_times': 0}
+
+    def write_laps(df):
+        df.to_csv(lap_path, mode='a' if counts['lap_times'] else 'w', header=not counts['lap_times'],
+                  index=False, na_rep='\\N')
+        counts['lap_times'] += len(df)
+
+    tables = generate(lap_sink=write_laps, **kwargs)
+    write_tables(tables, data_directory)
+    counts.update((key, len(df)) for key, df in tables.items())
+    return counts
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic F1 data in the Ergast CSV layout.")
+    parser.add_argument('--out', required=True, help="Data directory to write the CSV files to")
+    parser.add_argument('--scale', type=int, default=1, help="Multiplies the number of seasons")
+    parser.add_argument('--seasons', type=int, default=75, help="Seasons at scale 1")
+    parser.add_argument('--rounds', type=int, default=20, help="Races per season")
+    parser.add_argument('--field', type=int, default=20, help="Cars per race (two per team)")
+    parser.add_argument('--laps', type=int, default=60, help="Laps per race")
+    parser.add_argument('--first-year', type=int, default=1950)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    counts = generate_to(args.out, seasons=args.seasons * args.scale, rounds=args.rounds, field=args.field,
+                         laps=args.laps, first_year=args.first_year, seed=args.seed)
+    for key in DATASETS:
+        print(f"{DATASETS[key]:28s} {counts[key]:>12,d} rows", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
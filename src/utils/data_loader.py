@@ -1,42 +1,200 @@
 import pandas as pd
+import io
 import os
-import numpy as np
+import json
+import hashlib
+import pickle
+import shutil
+from pandas.api.types import is_integer_dtype, is_numeric_dtype, union_categoricals
+from utils.schemas import NA_VALUES, SCHEMAS
 
-def clean_data(df):
-    """Cleans and preprocesses a dataframe."""
-    df = df.replace("\\N", np.nan)  # Replace missing values represented as '\N' with NaN
-    df = df.apply(pd.to_numeric, errors='ignore')  # Convert numerical columns properly
+# Parsed frames are cached next to the CSVs and reused until the source changes
+CACHE_DIR_NAME = '.cache'
+# Bump whenever read_dataset or the schemas change so stale cache entries are rebuilt
+CACHE_VERSION = 2
+
+DATASETS = {
+    'drivers': 'drivers.csv',
+    'constructors': 'constructors.csv',
+    'results': 'results.csv',
+    'races': 'races.csv',
+    'pit_stops': 'pit_stops.csv',
+    'lap_times': 'lap_times.csv',
+    'driver_standings': 'driver_standings.csv',
+    'constructor_standings': 'constructor_standings.csv',
+    'qualifying': 'qualifying.csv'
+}
+
+def read_dataset(file_path, key):
+    """Reads a CSV with its declared schema: '\\N' becomes NA in the parser and columns get compact dtypes."""
+    df = pd.read_csv(file_path, dtype=SCHEMAS.get(key), na_values=NA_VALUES, keep_default_na=False)
     df.columns = df.columns.str.strip()  # Remove any leading/trailing spaces in column names
+    return df
+
+def append_rows(previous, new_rows):
+    """previous followed by new_rows, keeping categorical columns categorical (old categories first)."""
+    combined = pd.concat([previous, new_rows], ignore_index=True)
+    for col in previous.columns:
+        if isinstance(previous[col].dtype, pd.CategoricalDtype) and not isinstance(combined[col].dtype, pd.CategoricalDtype):
+            combined[col] = union_categoricals([previous[col], new_rows[col].astype('category')])
+    return combined
+
+def impute(df, columns=None):
+    """Returns a copy of df with missing values filled: mode for text columns, median for numeric ones.
+
+    Datasets are loaded with their gaps intact; pages call this only for the columns they need filled.
+    """
+    df = df.copy()
+    for col in (columns if columns is not None else df.columns):
+        if not df[col].hasnans:
+            continue
+        if is_integer_dtype(df[col]):  # Nullable ints can only take a whole-number fill
+            df[col] = df[col].fillna(round(df[col].median()))
+        elif is_numeric_dtype(df[col]):
+            df[col] = df[col].fillna(df[col].median())
+        else:
+            df[col] = df[col].fillna(df[col].mode()[0])
+    return df
+
+def file_signature(file_path):
+    """Returns the size and modification time used to detect changes to a source file."""
+    stat = os.stat(file_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+def content_hash(file_path, chunk_size=1 << 20):
+    """Returns the SHA-1 of a file's contents."""
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def grew_by_appending(file_path, meta):
+    """True if the file is the one described by meta (size, sha1) with whole lines appended to it."""
+    if meta is None or os.path.getsize(file_path) <= meta['size']:
+        return False
+    digest = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        remaining = meta['size']
+        while remaining:
+            chunk = f.read(min(1 << 20, remaining))
+            if not chunk:
+                return False
+            digest.update(chunk)
+            remaining -= len(chunk)
+        f.seek(meta['size'] - 1)
+        ends_with_newline = f.read(1) == b'\n'
+    # Without a trailing newline the first appended row would have been glued onto the last old one
+    return ends_with_newline and digest.hexdigest() == meta['sha1']
+
+def read_tail(file_path, offset):
+    """The header line of a CSV plus everything from byte offset on, as a buffer read_csv can parse."""
+    with open(file_path, 'rb') as f:
+        header = f.readline()
+        f.seek(offset)
+        return io.BytesIO(header + f.read())
 
-    # Fill missing values
-    for col in df.columns:
-        if df[col].dtype == 'object':  # Categorical column
-            df[col] = df[col].fillna(df[col].mode()[0])  # Fill with mode (most frequent value)
-        else:  # Numeric column
-            df[col] = df[col].fillna(df[col].median())  # Fill with median
+def _cache_paths(data_directory, key):
+    cache_directory = os.path.join(data_directory, CACHE_DIR_NAME)
+    return (os.path.join(cache_directory, f"{key}.pkl"),
+            os.path.join(cache_directory, f"{key}.json"))
 
+def _read_cache_meta(meta_path):
+    try:
+        with open(meta_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def _entry_is_current(meta):
+    """True if a cache entry was written by this cache layout and this pandas version."""
+    # Pickled frames are only guaranteed to load with the pandas that wrote them
+    return meta is not None and meta.get('version') == CACHE_VERSION and meta.get('pandas') == pd.__version__
+
+def _cache_is_fresh(meta, file_path, signature):
+    """Checks a cache entry against the source file's size, mtime and, if needed, its hash."""
+    if not _entry_is_current(meta):
+        return False
+    if meta.get('size') != signature['size']:
+        return False
+    if meta.get('mtime_ns') == signature['mtime_ns']:
+        return True
+    # Same size but touched: only the content hash can tell whether it really changed
+    return meta.get('sha1') == content_hash(file_path)
+
+def _write_cache(df, file_path, signature, pickle_path, meta_path):
+    os.makedirs(os.path.dirname(pickle_path), exist_ok=True)
+    meta = dict(signature, version=CACHE_VERSION, pandas=pd.__version__, sha1=content_hash(file_path))
+    # Write to temporary files first so a concurrent reader never sees a partial entry
+    df.to_pickle(pickle_path + '.tmp')
+    os.replace(pickle_path + '.tmp', pickle_path)
+    _write_meta(meta, meta_path)
+
+def _write_meta(meta, meta_path):
+    with open(meta_path + '.tmp', 'w') as f:
+        json.dump(meta, f)
+    os.replace(meta_path + '.tmp', meta_path)
+
+def cache_meta(data_directory, cache_key):
+    """Size, mtime and sha1 of the source file as of the current cache entry (None if there is none)."""
+    meta = _read_cache_meta(_cache_paths(data_directory, cache_key)[1])
+    return meta if _entry_is_current(meta) else None
+
+def _read_cached(pickle_path):
+    try:
+        return pd.read_pickle(pickle_path)
+    except (OSError, ValueError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None  # Unreadable entry (e.g. written by another pandas/numpy): the caller rebuilds it
+
+def cached_frame(data_directory, cache_key, file_path, build, use_cache=True, append=None):
+    """Returns build(), cached on disk under cache_key until the source file at file_path changes.
+
+    If the file only had rows appended since the entry was written and append is given, the
+    entry is brought up to date with append(cached_frame, offset_of_the_new_rows) instead.
+    """
+    signature = file_signature(file_path)
+    pickle_path, meta_path = _cache_paths(data_directory, cache_key)
+
+    meta = _read_cache_meta(meta_path) if use_cache else None
+    if use_cache and _cache_is_fresh(meta, file_path, signature):
+        df = _read_cached(pickle_path)
+        if df is not None:
+            if meta['mtime_ns'] != signature['mtime_ns']:
+                try:
+                    _write_meta(dict(meta, **signature), meta_path)  # Skip the hash next time
+                except OSError:
+                    pass
+            return df
+
+    df = None
+    if use_cache and append is not None and _entry_is_current(meta) and grew_by_appending(file_path, meta):
+        previous = _read_cached(pickle_path)
+        if previous is not None:
+            df = append(previous, meta['size'])
+    if df is None:
+        df = build()
+    if use_cache:
+        try:
+            _write_cache(df, file_path, signature, pickle_path, meta_path)
+        except OSError:
+            pass  # A read-only data directory just means no cache
     return df
 
-def load_all_data(data_directory):
-    """Loads and cleans all datasets from the given directory."""
-    
-    datasets = {
-        'drivers': 'drivers.csv',
-        'constructors': 'constructors.csv',
-        'results': 'results.csv',
-        'races': 'races.csv',
-        'pit_stops': 'pit_stops.csv',
-        'lap_times': 'lap_times.csv',
-        'driver_standings': 'driver_standings.csv',
-        'constructor_standings': 'constructor_standings.csv',
-        'qualifying': 'qualifying.csv'
-    }
+def load_dataset(data_directory, key, use_cache=True):
+    """Loads a single dataset, reusing the on-disk cache when the CSV is unchanged."""
+    file_path = os.path.join(data_directory, DATASETS[key])
+    return cached_frame(data_directory, key, file_path, lambda: read_dataset(file_path, key), use_cache=use_cache,
+                        append=lambda previous, offset: append_rows(previous, read_dataset(read_tail(file_path, offset), key)))
+
+def clear_cache(data_directory):
+    """Removes every cached dataset from the given directory."""
+    shutil.rmtree(os.path.join(data_directory, CACHE_DIR_NAME), ignore_errors=True)
 
+def load_all_data(data_directory, use_cache=True):
+    """Loads all datasets from the given directory."""
     data = {}
 
-    for key, file_name in datasets.items():
-        file_path = os.path.join(data_directory, file_name)
-        df = pd.read_csv(file_path)
-        data[key] = clean_data(df)  # Apply cleaning function to each dataset
+    for key in DATASETS:
+        data[key] = load_dataset(data_directory, key, use_cache=use_cache)
 
     return data
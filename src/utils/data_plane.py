@@ -0,0 +1,158 @@
+import json
+import os
+import pickle
+import shutil
+import time
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_extension_array_dtype, is_string_dtype, pandas_dtype
+from utils.data_loader import CACHE_DIR_NAME, DATASETS, content_hash, grew_by_appending, load_dataset
+
+# Published snapshots live here unless F1_PLANE_DIR says otherwise
+PLANE_DIR_NAME = 'plane'
+MANIFEST_NAME = 'CURRENT.json'
+# Snapshots older than the newest few are deleted on publish; workers re-attach long before that
+KEEP_VERSIONS = 3
+# Raw datasets that are not published: pages only read what is derived from them
+UNPUBLISHED = {'lap_times'}
+# pandas 1.x only keeps the memory-mapped columns as separate, uncopied blocks with copy=False;
+# pandas 3 never copies on concat and deprecates the keyword
+_CONCAT_KWARGS = {'copy': False} if int(pd.__version__.split('.')[0]) < 3 else {}
+
+def plane_directory(data_directory):
+    return os.environ.get('F1_PLANE_DIR') or os.path.join(data_directory, CACHE_DIR_NAME, PLANE_DIR_NAME)
+
+def _write_column(series, directory, position, encode_strings=True):
+    """Writes one column as .npy files where its values allow it; returns how to read it back."""
+    base = os.path.join(directory, str(position))
+    if encode_strings and (series.dtype == object or is_string_dtype(series.dtype)):
+        # Text as dictionary codes: the codes are mapped like any array and only the distinct
+        # values are unpickled per worker; the column reads back as a categorical
+        series = series.astype('category')
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        np.save(base + '.npy', series.cat.codes.to_numpy())
+        with open(base + '.pkl', 'wb') as f:
+            pickle.dump(series.cat.categories, f)
+        return {'kind': 'category', 'ordered': bool(series.cat.ordered)}
+    if is_extension_array_dtype(series.dtype) and series.dtype.kind in 'biuf':
+        # Nullable ints/floats/bools: the values and the NA mask are two plain arrays
+        np.save(base + '.npy', series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0))
+        np.save(base + '.mask.npy', series.isna().to_numpy())
+        return {'kind': 'masked', 'dtype': str(series.dtype)}
+    if series.dtype.kind in 'biuf':
+        np.save(base + '.npy', series.to_numpy())
+        return {'kind': 'array'}
+    # Other objects (and text in an index) can't be mapped; every worker unpickles its own copy
+    with open(base + '.pkl', 'wb') as f:
+        pickle.dump(series.to_numpy(), f)
+    return {'kind': 'pickle', 'dtype': str(series.dtype)}
+
+def _read_column(spec, directory, position):
+    base = os.path.join(directory, str(position))
+    if spec['kind'] == 'pickle':
+        with open(base + '.pkl', 'rb') as f:
+            return pickle.load(f)
+    # A plain ndarray view of the mapping, so results computed from it aren't np.memmap too
+    values = np.load(base + '.npy', mmap_mode='r').view(np.ndarray)
+    if spec['kind'] == 'array':
+        return values
+    if spec['kind'] == 'masked':
+        mask = np.load(base + '.mask.npy', mmap_mode='r').view(np.ndarray)
+        return pandas_dtype(spec['dtype']).construct_array_type()(values, mask, copy=False)
+    with open(base + '.pkl', 'rb') as f:
+        categories = pickle.load(f)
+    return pd.Categorical.from_codes(values, dtype=pd.CategoricalDtype(categories, spec['ordered']))
+
+def write_table(df, directory):
+    """Writes a frame as one file per column plus a layout.json; returns the layout."""
+    os.makedirs(directory, exist_ok=True)
+    layout = {
+        'columns': [str(col) for col in df.columns],
+        'specs': [_write_column(df[col], directory, i) for i, col in enumerate(df.columns)],
+        'rows': len(df),
+        'index': None,
+    }
+    if not isinstance(df.index, pd.RangeIndex) or df.index.start != 0 or df.index.step != 1:
+        layout['index'] = {'name': df.index.name,
+                           'spec': _write_column(df.index.to_series(), directory, 'index', encode_strings=False)}
+    with open(os.path.join(directory, 'layout.json'), 'w') as f:
+        json.dump(layout, f)
+    return layout
+
+def read_table(directory):
+    """Attaches to a table written by write_table; numeric columns stay memory-mapped and read-only."""
+    with open(os.path.join(directory, 'layout.json')) as f:
+        layout = json.load(f)
+    columns = [pd.Series(_read_column(spec, directory, i), name=col, dtype=spec.get('dtype'), copy=False)
+               for i, (col, spec) in enumerate(zip(layout['columns'], layout['specs']))]
+    if columns:
+        df = pd.concat(columns, axis=1, **_CONCAT_KWARGS)
+    else:
+        df = pd.DataFrame(index=pd.RangeIndex(layout['rows']))
+    if layout['index'] is not None:
+        df.index = pd.Index(_read_column(layout['index']['spec'], directory, 'index'), name=layout['index']['name'])
+    return df
+
+def read_manifest(directory):
+    try:
+        with open(os.path.join(directory, MANIFEST_NAME)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def publish(data_directory, loaders, directory=None):
+    """Writes a new snapshot of every table in loaders ({name: (source file, load())}) and makes it current.
+
+    Tables whose source is unchanged since the current snapshot are linked into the new one
+    rather than rewritten. A table whose source only grew records the row count it grew from,
+    so attached workers can extend what they derived from it instead of recomputing.
+    """
+    directory = directory or plane_directory(data_directory)
+    previous = read_manifest(directory) or {'version': 0, 'tables': {}}
+    version = previous['version'] + 1
+    snapshot = os.path.join(directory, f"v{version}")
+    shutil.rmtree(snapshot, ignore_errors=True)
+
+    tables = {}
+    for name, (file_path, load) in loaders.items():
+        if not os.path.exists(file_path):
+            continue
+        sha1 = content_hash(file_path)
+        entry = {'sha1': sha1, 'size': os.path.getsize(file_path)}
+        before = previous['tables'].get(name)
+        if before is not None and before['sha1'] == sha1:
+            tables[name] = before  # Same content: keep pointing at the older snapshot's files
+            continue
+        df = load()
+        entry['path'] = os.path.join(f"v{version}", name)
+        entry['rows'] = write_table(df, os.path.join(directory, entry['path']))['rows']
+        if before is not None and grew_by_appending(file_path, before):
+            entry['extends'] = {'sha1': before['sha1'], 'rows': before['rows']}
+        tables[name] = entry
+
+    if not tables or (previous['version'] and tables == previous['tables']):
+        return previous  # Nothing (new) to publish: workers stay attached to the current snapshot
+    manifest = {'version': version, 'published_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'), 'tables': tables}
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, MANIFEST_NAME + '.tmp'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(os.path.join(directory, MANIFEST_NAME + '.tmp'), os.path.join(directory, MANIFEST_NAME))
+    _remove_old_snapshots(directory, manifest)
+    return manifest
+
+def _remove_old_snapshots(directory, manifest):
+    in_use = {entry['path'].split(os.sep)[0] for entry in manifest['tables'].values()}
+    versions = sorted((int(name[1:]) for name in os.listdir(directory)
+                       if name.startswith('v') and name[1:].isdigit()), reverse=True)
+    for number in versions[KEEP_VERSIONS:]:
+        if f"v{number}" not in in_use:
+            # Workers still mapping these files keep them alive until they re-attach (POSIX)
+            shutil.rmtree(os.path.join(directory, f"v{number}"), ignore_errors=True)
+
+def dataset_loaders(data_directory, derived=None):
+    """The loaders publish() takes for every raw dataset plus derived tables ({name: (dataset, build)})."""
+    loaders = {name: (os.path.join(data_directory, file_name), lambda name=name: load_dataset(data_directory, name))
+               for name, file_name in DATASETS.items() if name not in UNPUBLISHED}
+    for name, (dataset, build) in (derived or {}).items():
+        loaders[name] = (os.path.join(data_directory, DATASETS[dataset]), lambda build=build: build(data_directory))
+    return loaders
@@ -0,0 +1,207 @@
+import os
+import threading
+from utils import memo
+from utils.data_loader import DATASETS, cache_meta, file_signature, grew_by_appending, load_dataset
+from utils.lap_stats import load_lap_time_stats
+from utils.data_plane import plane_directory, read_manifest, read_table
+from utils.sqlite_store import get_sqlite_store
+
+# 'pandas' parses the CSVs into this process; 'sqlite' reads them from a shared on-disk SQLite copy;
+# 'shared' maps the snapshot published by publish_data.py, so worker processes share one copy
+BACKENDS = ('pandas', 'sqlite', 'shared')
+DEFAULT_BACKEND = os.environ.get('F1_BACKEND', 'pandas')
+
+# Tables built from a source file instead of loaded as-is
+DERIVED_TABLES = {
+    'lap_time_stats': load_lap_time_stats,
+}
+# Source file and cache entry of each derived table
+DERIVED_SOURCES = {
+    'lap_time_stats': ('lap_times', 'lap_time_stats'),
+}
+
+class DataStore:
+    """Holds the cleaned datasets of one data directory for the lifetime of the process.
+
+    select() and aggregate() answer filtered queries without handing out whole tables: with the
+    sqlite backend they run in SQLite on its indexes, with the pandas backend on the loaded frames.
+    """
+
+    def __init__(self, data_directory, backend=DEFAULT_BACKEND):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend {backend!r}; expected one of {BACKENDS}")
+        self.data_directory = data_directory
+        self.backend = backend
+        self.sql = get_sqlite_store(data_directory) if backend == 'sqlite' else None
+        self.plane = plane_directory(data_directory) if backend == 'shared' else None
+        self._manifest = None  # Snapshot the shared tables were attached from
+        self._tables = {}
+        self._lock = threading.Lock()
+        self._table_locks = {name: threading.Lock() for name in list(DATASETS) + list(DERIVED_TABLES)}
+
+    def table(self, name):
+        """Returns a dataset, parsing it only the first time any session asks for it."""
+        df = self._tables.get(name)
+        if df is not None:
+            return df
+        # One lock per table: concurrent sessions wait for a single parse instead of repeating it
+        with self._table_locks[name]:
+            df = self._tables.get(name)
+            if df is None:
+                df = self._load(name)
+                self._tables[name] = df
+        return df
+
+    def _load(self, name):
+        if self.plane is not None:
+            if self._manifest is None:
+                self._manifest = read_manifest(self.plane)
+            entry = (self._manifest or {'tables': {}})['tables'].get(name)
+            if entry is not None:
+                return read_table(os.path.join(self.plane, entry['path']))
+            # Not published (yet): this process loads its own copy
+        if name in DERIVED_TABLES:
+            return DERIVED_TABLES[name](self.data_directory)
+        if self.sql is not None:
+            return self.sql.table(name)
+        return load_dataset(self.data_directory, name)
+
+    def _filtered(self, name, with_year, filters):
+        df = self.table(name)
+        if with_year and 'year' not in df.columns:
+            years = self.table('races').set_index('raceId')['year']
+            df = df.assign(year=years.reindex(df['raceId'].to_numpy()).to_numpy())
+        for col, value in filters.items():
+            if isinstance(value, (list, tuple, set)):
+                df = df[df[col].isin(list(value))]
+            else:
+                df = df[df[col] == value]
+        return df
+
+    def select(self, name, columns=None, with_year=False, **filters):
+        """Rows of a table matching column=value (or column=[values]) filters, optionally with their season."""
+        if self.sql is not None:
+            return self.sql.select(name, columns, with_year, **filters)
+        df = self._filtered(name, with_year, filters)
+        if columns is not None:
+            df = df[list(columns) + (['year'] if with_year and 'year' not in columns else [])]
+        return df.reset_index(drop=True)
+
+    def aggregate(self, name, by, column, how='sum', with_year=False, **filters):
+        """how(column) per group of the `by` columns over the filtered rows, e.g. season points per driver."""
+        if self.sql is not None:
+            return self.sql.aggregate(name, by, column, how, with_year, **filters)
+        return self._filtered(name, with_year, filters).groupby(by)[column].agg(how).reset_index()
+
+    def _source(self, name):
+        """Path of the file a table is built from and the key of its cache entry."""
+        dataset, cache_key = DERIVED_SOURCES.get(name, (name, name))
+        return os.path.join(self.data_directory, DATASETS[dataset]), cache_key
+
+    def refresh(self):
+        """Brings the loaded tables up to date with their files without starting over.
+
+        Files that only had rows appended are ingested from where the cache left off and the memoized
+        results built on them are extended rather than recomputed (see memo.extend); tables whose
+        file changed in any other way are reloaded. Returns {table: 'appended' or 'reloaded'}.
+        """
+        if self.plane is not None:
+            return self._reattach()
+        changes = {}
+        replacements = {}
+        superseded = []  # Keeps the old frames, and so their memo entries, alive until extend() ran
+        with self._lock:
+            loaded = list(self._tables)
+        for name in loaded:
+            with self._table_locks[name]:
+                old = self._tables.get(name)
+                if old is None:
+                    continue
+                file_path, cache_key = self._source(name)
+                if not os.path.exists(file_path):
+                    continue  # No source to refresh from, e.g. the shipped data has no lap_times.csv
+                meta = cache_meta(self.data_directory, cache_key)
+                if meta is not None and file_signature(file_path) == {'size': meta['size'], 'mtime_ns': meta['mtime_ns']}:
+                    continue
+                appended = grew_by_appending(file_path, meta)
+                new = self._load(name)  # The loader picks the appended or the full path itself
+                new_meta = cache_meta(self.data_directory, cache_key)
+                if meta is not None and new_meta is not None and new_meta['sha1'] == meta['sha1']:
+                    continue  # Touched but unchanged
+                self._tables[name] = new
+                changes[name] = 'appended' if appended else 'reloaded'
+                if appended and name in DATASETS:
+                    replacements[id(old)] = (new, len(old))
+                    superseded.append(old)
+        self._update_derived(changes, replacements)
+        return changes
+
+    def _reattach(self):
+        """refresh() for the shared backend: switches to the latest published snapshot, if there is a newer one."""
+        manifest = read_manifest(self.plane)
+        if manifest is None or (self._manifest is not None and manifest['version'] == self._manifest['version']):
+            return {}
+        attached = (self._manifest or {'tables': {}})['tables']
+        changes = {}
+        replacements = {}
+        superseded = []
+        with self._lock:
+            loaded = list(self._tables)
+        for name in loaded:
+            with self._table_locks[name]:
+                old = self._tables.get(name)
+                entry, before = manifest['tables'].get(name), attached.get(name)
+                if old is None or entry is None or (before is not None and before['sha1'] == entry['sha1']):
+                    continue  # Unchanged tables keep their frames, and with them every memoized result
+                new = read_table(os.path.join(self.plane, entry['path']))
+                self._tables[name] = new
+                extends = entry.get('extends')
+                if before is not None and extends is not None and extends['sha1'] == before['sha1'] and name in DATASETS:
+                    changes[name] = 'appended'
+                    replacements[id(old)] = (new, extends['rows'])
+                    superseded.append(old)
+                else:
+                    changes[name] = 'reloaded'
+        self._manifest = manifest
+        self._update_derived(changes, replacements)
+        return changes
+
+    def _update_derived(self, changes, replacements):
+        if any(change == 'reloaded' for change in changes.values()):
+            memo.clear_all()  # Rewritten rows invalidate everything derived from them
+        elif replacements:
+            memo.extend(replacements)
+
+    def tables(self, names=None):
+        """Returns a dict of the requested datasets (all raw datasets by default)."""
+        return {name: self.table(name) for name in (names or DATASETS)}
+
+    def invalidate(self, name=None):
+        """Drops one dataset, or all of them, so the next access reloads from disk."""
+        with self._lock:
+            if name is None:
+                self._tables.clear()
+            else:
+                self._tables.pop(name, None)
+            if self.plane is not None and name is None:
+                self._manifest = None  # Attach to whatever snapshot is current on the next access
+        memo.clear_all()  # Derived results were built from the dropped frames
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_store(data_directory='data', backend=None):
+    """Returns the shared store for a data directory, creating it (with F1_BACKEND by default) on first use."""
+    with _stores_lock:
+        store = _stores.get(data_directory)
+        if store is None:
+            store = _stores[data_directory] = DataStore(data_directory, backend or DEFAULT_BACKEND)
+        return store
+
+def invalidate(data_directory=None):
+    """Invalidation hook: forgets loaded datasets for one directory or for every store."""
+    with _stores_lock:
+        stores = list(_stores.values()) if data_directory is None else [_stores.get(data_directory)]
+    for store in stores:
+        if store is not None:
+            store.invalidate()
@@ -0,0 +1,84 @@
+import bisect
+import difflib
+import itertools
+import pandas as pd
+import streamlit as st
+from utils.memo import memoize_frames
+
+class EntityIndex:
+    """Two-way id <-> display name lookup for drivers or constructors, with search for pickers.
+
+    Labels are unique: entities that share a name get a disambiguating suffix.
+    """
+
+    def __init__(self, ids, labels):
+        self.ids = list(ids)
+        self.labels = list(labels)
+        self.names = pd.Series(self.labels, index=self.ids)  # id -> label, for Series.map
+        self._ids_by_label = dict(zip(self.labels, self.ids))
+        self._lowered = [label.lower() for label in self.labels]
+        # Lower-cased label and word prefixes, sorted for bisect-based prefix search
+        self._keys = sorted(
+            (word, position)
+            for position, label in enumerate(self._lowered)
+            for word in [label] + label.split()[1:]
+        )
+
+    def label(self, entity_id):
+        """Display label of an id (None if unknown)."""
+        return self.names.get(entity_id)
+
+    def id(self, label):
+        """Id behind a display label."""
+        return self._ids_by_label[label]
+
+    def search(self, query, limit=20):
+        """Labels whose full name or any later word starts with query, else the closest matches."""
+        query = query.strip().lower()
+        if not query:
+            return self.labels
+        start = bisect.bisect_left(self._keys, (query, -1))
+        positions = []
+        for word, position in itertools.islice(self._keys, start, None):
+            if not word.startswith(query):
+                break
+            positions.append(position)
+        if positions:
+            return [self.labels[position] for position in sorted(set(positions))][:limit]
+        # No prefix hit (e.g. a typo): fall back to fuzzy matching on the whole label
+        matches = difflib.get_close_matches(query, self._lowered, n=limit, cutoff=0.6)
+        return [self.labels[self._lowered.index(match)] for match in matches]
+
+def _unique_labels(names, *qualifiers):
+    """Appends the first qualifier that tells duplicated names apart, e.g. 'John Smith (1952)'."""
+    labels = names.copy()
+    for qualifier in qualifiers:
+        duplicated = labels.duplicated(keep=False)
+        if not duplicated.any():
+            break
+        labels[duplicated] = names[duplicated] + ' (' + qualifier[duplicated].astype(str) + ')'
+    return labels
+
+@memoize_frames
+def driver_index(drivers):
+    """EntityIndex over drivers labelled 'Forename Surname'."""
+    names = drivers['forename'].astype(str) + ' ' + drivers['surname'].astype(str)
+    labels = _unique_labels(names, drivers['dob'].astype(str).str[:4], drivers['driverRef'], drivers['driverId'])
+    return EntityIndex(drivers['driverId'].tolist(), labels.tolist())
+
+@memoize_frames
+def constructor_index(constructors):
+    """EntityIndex over constructors labelled by name."""
+    names = constructors['name'].astype(str)
+    labels = _unique_labels(names, constructors['constructorRef'], constructors['constructorId'])
+    return EntityIndex(constructors['constructorId'].tolist(), labels.tolist())
+
+def select_entity(label, index, container=st, key=None, default=0):
+    """Selectbox over an EntityIndex with a search box in front of it; returns the selected id."""
+    query = container.text_input(f"Search {label.lower()}", key=None if key is None else f"{key}_search")
+    options = index.search(query) if query else index.labels
+    if not options:
+        container.write("No matches.")
+        options = index.labels
+    selected = container.selectbox(label, options, index=min(default, len(options) - 1), key=key)
+    return index.id(selected), selected
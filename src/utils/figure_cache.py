@@ -0,0 +1,73 @@
+import io
+import json
+import threading
+from collections import OrderedDict
+import matplotlib
+matplotlib.use('Agg')  # Figures are only ever rendered to bytes
+import matplotlib.pyplot as plt
+import streamlit as st
+from utils.model_registry import frame_fingerprint
+from utils.profiling import phase
+
+class FigureCache:
+    """LRU cache of rendered figures (PNG or SVG bytes), bounded by total size."""
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            data = self._entries.get(key)
+            if data is not None:
+                self._entries.move_to_end(key)
+            return data
+
+    def put(self, key, data):
+        with self._lock:
+            if key in self._entries:
+                return
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+figure_cache = FigureCache()
+
+def figure_key(page, inputs, frames, fmt):
+    """Cache key: page, the user inputs that shape the figure and the fingerprints of its data."""
+    return (page, json.dumps(inputs, sort_keys=True, default=str),
+            tuple(frame_fingerprint(df) for df in frames), fmt)
+
+def render_figure(fig, fmt='png', dpi=200):
+    """Serializes a matplotlib figure and releases it."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, dpi=dpi, bbox_inches='tight')
+    plt.close(fig)
+    return buffer.getvalue()
+
+def cached_figure(page, inputs, frames, draw, fmt='png'):
+    """Returns the rendered bytes of draw() (which returns a figure), drawing only on a cache miss."""
+    key = figure_key(page, inputs, frames, fmt)
+    data = figure_cache.get(key)
+    if data is None:
+        data = render_figure(draw(), fmt=fmt)
+        figure_cache.put(key, data)
+    return data
+
+def show_figure(page, inputs, frames, draw, container=st, fmt='png'):
+    """Displays a cached figure in place of st.pyplot(draw())."""
+    with phase('render'):
+        data = cached_figure(page, inputs, frames, draw, fmt=fmt)
+        if fmt == 'svg':
+            container.markdown(data.decode(), unsafe_allow_html=True)
+        else:
+            container.image(data)
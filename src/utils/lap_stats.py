@@ -0,0 +1,85 @@
+import os
+import numpy as np
+import pandas as pd
+from utils.data_loader import DATASETS, cached_frame, read_tail
+from utils.memo import memoize_frames
+from utils.schemas import NA_VALUES, SCHEMAS
+
+# Rows of lap_times.csv parsed at a time; peak memory is bounded by this, not by the file size
+CHUNK_SIZE = 250_000
+
+# How two partial aggregates of the same group combine
+AGGREGATE_RULES = {'count': 'sum', 'sum': 'sum', 'min': 'min', 'max': 'max', 'sum_sq': 'sum'}
+
+def aggregate_chunk(chunk, key='raceId'):
+    """Computes count, sum, min, max and sum of squares of lap times (ms) per key for one chunk."""
+    ms = chunk['milliseconds'].astype('float64')
+    grouped = ms.groupby(chunk[key])
+    return pd.DataFrame({
+        'count': grouped.count(),
+        'sum': grouped.sum(),
+        'min': grouped.min(),
+        'max': grouped.max(),
+        'sum_sq': (ms * ms).groupby(chunk[key]).sum(),
+    })
+
+def combine_aggregates(*parts):
+    """Merges partial aggregates that share an index into one row per group."""
+    parts = [part for part in parts if part is not None]
+    return pd.concat(parts).groupby(level=0).agg(AGGREGATE_RULES)
+
+def lap_time_aggregates(file_path, chunksize=CHUNK_SIZE):
+    """Streams lap_times.csv (a path or buffer) and returns per-race running aggregates without keeping the raw laps."""
+    dtypes = {col: SCHEMAS['lap_times'][col] for col in ('raceId', 'milliseconds')}
+    reader = pd.read_csv(file_path, usecols=list(dtypes), dtype=dtypes,
+                         na_values=NA_VALUES, keep_default_na=False, chunksize=chunksize)
+    totals = None
+    for chunk in reader:
+        totals = combine_aggregates(totals, aggregate_chunk(chunk))
+    return totals if totals is not None else empty_aggregates()
+
+def empty_aggregates():
+    """The aggregates of no laps at all: the columns of lap_time_aggregates without rows."""
+    totals = pd.DataFrame(columns=list(AGGREGATE_RULES))
+    totals.index.name = 'raceId'
+    return totals
+
+def load_lap_time_stats(data_directory, use_cache=True):
+    """Per-race lap time aggregates for a data directory, cached until lap_times.csv changes.
+
+    Laps appended to the file are aggregated on their own and merged into the cached totals.
+    Without a lap_times.csv (the shipped data has none) there are no laps and nothing is cached.
+    """
+    file_path = os.path.join(data_directory, DATASETS['lap_times'])
+    if not os.path.exists(file_path):
+        return empty_aggregates()
+    return cached_frame(data_directory, 'lap_time_stats', file_path,
+                        lambda: lap_time_aggregates(file_path), use_cache=use_cache,
+                        append=lambda previous, offset: _merge_laps(previous, lap_time_aggregates(read_tail(file_path, offset))))
+
+def _merge_laps(previous, added):
+    totals = combine_aggregates(previous, added)
+    totals.index.name = 'raceId'
+    return totals
+
+@memoize_frames
+def circuit_aggregates(race_stats, races):
+    """Rolls per-race aggregates up to one row per circuit."""
+    circuit_ids = races.set_index('raceId')['circuitId'].reindex(race_stats.index)
+    known = circuit_ids.notna().values  # Laps of races missing from races.csv have no circuit
+    stats = race_stats[known].groupby(circuit_ids[known].astype('int32').values).agg(AGGREGATE_RULES)
+    stats.index.name = 'circuitId'
+    return stats
+
+def summarize(stats):
+    """Turns aggregates into mean, standard deviation, min and max lap time in seconds."""
+    count = stats['count'].astype('float64')
+    mean = stats['sum'] / count
+    variance = (stats['sum_sq'] / count - mean ** 2).clip(lower=0)
+    return pd.DataFrame({
+        'laps': stats['count'],
+        'mean_sec': mean / 1000,
+        'std_sec': np.sqrt(variance) / 1000,
+        'min_sec': stats['min'] / 1000,
+        'max_sec': stats['max'] / 1000,
+    }, index=stats.index)
@@ -0,0 +1,194 @@
+import functools
+import inspect
+import threading
+import weakref
+from collections import OrderedDict
+from concurrent.futures import Future
+import pandas as pd
+
+_memoized = []
+
+# Entries kept per function for calls that set its bounded argument (e.g. one per era)
+BOUNDED_ENTRIES = 4
+
+def _source(value):
+    """How an argument is kept for incremental updates: frames by weak reference, so entries don't keep them alive."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return ('frame', weakref.ref(value))
+    return ('value', value)
+
+def _resolve(source, replacements):
+    """The current value of a kept argument; raises LookupError if its frame is gone."""
+    kind, value = source
+    if kind == 'value':
+        return value
+    frame = value()
+    if frame is None:
+        raise LookupError
+    return replacements[id(frame)][0] if id(frame) in replacements else frame
+
+def _token(value, frames):
+    """Hashable stand-in for an argument: DataFrames/Series by identity, everything else by value."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        frames.append(value)
+        return ('frame', id(value))
+    if isinstance(value, list):
+        return tuple(_token(v, frames) for v in value)
+    return value
+
+def memoize_frames(fn=None, *, bounded=None, maxsize=BOUNDED_ENTRIES):
+    """Caches fn's result per identity of its DataFrame arguments and value of the others.
+
+    The store hands every page the same frame objects, so a derived result is computed once per
+    process and reused on every rerun. Entries are dropped when a frame they were built from is
+    garbage collected (e.g. after the store is invalidated). Concurrent callers asking for the
+    same entry wait for the first computation instead of starting their own.
+
+    A function can register an updater with @fn.incremental; extend() then derives its entries for
+    frames that only had rows appended from the entries of the frames they replace.
+
+    bounded names an argument whose values are open-ended (a slider range, say): calls where it
+    is not None are kept in an LRU of maxsize entries rather than for as long as the frames live.
+    """
+    if fn is None:
+        return lambda fn: memoize_frames(fn, bounded=bounded, maxsize=maxsize)
+    cache = {}
+    lock = threading.Lock()
+    signature = inspect.signature(fn)
+    frame_keys = {}  # id of a live frame -> cache keys built from it
+    sources = {}  # cache key -> (args, kwargs) as _source() tuples, for functions with an updater
+    updaters = []
+    recent = OrderedDict()  # bounded cache key -> ids of its frames, least recently used first
+
+    def _forget(frame_id):
+        with lock:
+            for key in frame_keys.pop(frame_id, ()):
+                cache.pop(key, None)
+                sources.pop(key, None)
+                recent.pop(key, None)
+
+    def _key(args, kwargs, frames):
+        # Bound with defaults, so f(df), f(df, None) and f(df, race_ids=None) share one entry
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        key = tuple(_token(value, frames) for value in bound.arguments.values())
+        return key, bounded is not None and bound.arguments[bounded] is not None
+
+    def _register(key, frames, is_bounded):
+        # Caller holds the lock
+        for frame in frames:
+            if id(frame) not in frame_keys:
+                frame_keys[id(frame)] = set()
+                weakref.finalize(frame, _forget, id(frame))
+            frame_keys[id(frame)].add(key)
+        if is_bounded:
+            recent[key] = [id(frame) for frame in frames]
+            while len(recent) > maxsize:
+                _drop(*recent.popitem(last=False))
+
+    def _drop(key, frame_ids):
+        # Caller holds the lock; callers already waiting on an evicted entry still get its result
+        cache.pop(key, None)
+        sources.pop(key, None)
+        for frame_id in frame_ids:
+            frame_keys.get(frame_id, set()).discard(key)
+
+    @functools.wraps(fn)
+    def wrapper(*args, **kwargs):
+        frames = []
+        key, is_bounded = _key(args, kwargs, frames)
+        with lock:
+            future = cache.get(key)
+            owner = future is None
+            if owner:
+                future = cache[key] = Future()
+                _register(key, frames, is_bounded)
+                if updaters and not any(isinstance(arg, list) for arg in list(args) + list(kwargs.values())):
+                    sources[key] = ([_source(arg) for arg in args],
+                                    {name: _source(value) for name, value in kwargs.items()})
+            elif key in recent:
+                recent.move_to_end(key)
+        if not owner:
+            return future.result()
+        try:
+            future.set_result(fn(*args, **kwargs))
+        except BaseException as exc:
+            with lock:
+                cache.pop(key, None)  # Let the next caller retry
+                recent.pop(key, None)
+            future.set_exception(exc)
+            raise
+        return future.result()
+
+    def cache_clear():
+        with lock:
+            cache.clear()
+            sources.clear()
+            recent.clear()
+            for keys in frame_keys.values():
+                keys.clear()
+
+    def incremental(updater):
+        """Registers updater(previous_result, *args, appended, **kwargs) for extend().
+
+        args are the new call's arguments and appended maps the position (or keyword) of each
+        grown frame to its old length, i.e. the frame's new rows are .iloc[old_length:]. The
+        updater returns the result for the new arguments, or None if it has to be recomputed.
+        """
+        updaters.append(updater)
+        return updater
+
+    def extend(replacements):
+        """Derives entries for the new frames in replacements ({id(old): (new, old_length)})."""
+        if not updaters:
+            return 0
+        with lock:
+            keys = {key for frame_id in replacements for key in frame_keys.get(frame_id, ()) if key in sources}
+            entries = [(key, cache[key], sources[key]) for key in keys if key in cache]
+        extended = 0
+        for key, future, (arg_sources, kwarg_sources) in entries:
+            if not future.done() or future.exception() is not None:
+                continue
+            try:
+                args = [_resolve(source, replacements) for source in arg_sources]
+                kwargs = {name: _resolve(source, replacements) for name, source in kwarg_sources.items()}
+            except LookupError:
+                continue  # Built from a frame that has been collected since
+            appended = {}
+            for position, (kind, value) in list(enumerate(arg_sources)) + list(kwarg_sources.items()):
+                if kind == 'frame' and value() is not None and id(value()) in replacements:
+                    appended[position] = replacements[id(value())][1]
+            result = updaters[-1](future.result(), *args, appended=appended, **kwargs)
+            if result is None:
+                continue
+            frames = []
+            new_key, is_bounded = _key(args, kwargs, frames)
+            with lock:
+                if new_key in cache:
+                    continue
+                new_future = cache[new_key] = Future()
+                new_future.set_result(result)
+                _register(new_key, frames, is_bounded)
+                sources[new_key] = ([_source(arg) for arg in args],
+                                    {name: _source(value) for name, value in kwargs.items()})
+            extended += 1
+        return extended
+
+    wrapper.cache_clear = cache_clear
+    wrapper.incremental = incremental
+    wrapper.extend = extend
+    _memoized.append(wrapper)
+    return wrapper
+
+def extend(replacements):
+    """Carries every incremental memoized result over to frames that grew by appended rows.
+
+    replacements maps id(old frame) to (new frame, old length). Returns the number of entries
+    derived; functions without an updater recompute on their next call as usual.
+    """
+    return sum(wrapper.extend(replacements) for wrapper in _memoized)
+
+def clear_all():
+    """Empties every memoized cache; results that hold on to their source frames go with them."""
+    for wrapper in _memoized:
+        wrapper.cache_clear()
@@ -0,0 +1,96 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+import pandas as pd
+from utils.data_loader import CACHE_DIR_NAME
+from utils.memo import memoize_frames
+
+# Fitted models live next to the dataset cache (of the app's data directory), one pickle per (model name, fingerprint)
+DEFAULT_DIRECTORY = os.path.join(os.environ.get('F1_DATA_DIR', 'data'), CACHE_DIR_NAME, 'models')
+# Models kept per name, most recently used first. Runs on other data directories (batch reports,
+# benchmarks) share the registry, so a new fit must not evict the one the app is using.
+KEEP_MODELS = 5
+
+@memoize_frames
+def frame_fingerprint(df):
+    """SHA-1 over a frame's columns, dtypes and row hashes."""
+    digest = hashlib.sha1()
+    digest.update(json.dumps([[str(col), str(dtype)] for col, dtype in df.dtypes.items()]).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def fingerprint(frames, params):
+    """Identifies a fit by its training frames and hyperparameters."""
+    digest = hashlib.sha1()
+    for df in frames:
+        digest.update(frame_fingerprint(df).encode())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return digest.hexdigest()[:16]
+
+class ModelRegistry:
+    """Stores fitted estimators on disk and in memory, keyed by name and training fingerprint."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._models = {}
+        self._lock = threading.Lock()
+        self._key_locks = {}  # One per (name, fingerprint): different fits train concurrently
+
+    def _path(self, name, key):
+        return os.path.join(self.directory, f"{name}-{key}.pkl")
+
+    def get_or_train(self, name, train, frames, params):
+        """Returns the model for (frames, params), calling train(*frames, **params) only if none is stored."""
+        key = fingerprint(frames, params)
+        model = self._models.get((name, key))
+        if model is not None:
+            return model
+        with self._lock:
+            key_lock = self._key_locks.setdefault((name, key), threading.Lock())
+        with key_lock:
+            model = self._models.get((name, key))
+            if model is None:
+                model = self._load(name, key)
+            if model is None:
+                model = train(*frames, **params)
+                self._save(name, key, model)
+            self._models[(name, key)] = model
+        return model
+
+    def _load(self, name, key):
+        try:
+            with open(self._path(name, key), 'rb') as f:
+                model = pickle.load(f)
+            os.utime(self._path(name, key))  # Mark as recently used for _save's eviction
+            return model
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return None  # Missing or unreadable (e.g. written by another sklearn): retrain
+
+    def _save(self, name, key, model):
+        path = self._path(name, key)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(path + '.tmp', 'wb') as f:
+                pickle.dump(model, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(path + '.tmp', path)
+            self._evict(name)
+        except OSError:
+            pass  # Not persisted; the in-memory copy still serves this process
+
+    def _evict(self, name):
+        """Deletes all but the KEEP_MODELS most recently used models of a name."""
+        paths = [os.path.join(self.directory, file_name) for file_name in os.listdir(self.directory)
+                 if file_name.startswith(f"{name}-") and file_name.endswith('.pkl')]
+        for path in sorted(paths, key=os.path.getmtime, reverse=True)[KEEP_MODELS:]:
+            os.remove(path)
+
+_registries = {}
+
+def get_registry(directory=DEFAULT_DIRECTORY):
+    """Returns the shared registry for a directory."""
+    registry = _registries.get(directory)
+    if registry is None:
+        registry = _registries.setdefault(directory, ModelRegistry(directory))
+    return registry
@@ -0,0 +1,128 @@
+import importlib
+import sys
+import threading
+import time
+from utils.profiling import phase
+
+class Page:
+    """An analysis page: its sidebar title, the module with its run()/report(), and the tables they take in order.
+
+    queried lists the tables run() fetches row by row from a SQL-backed store instead of taking
+    them whole; with such a store they are not loaded and run() gets the store instead.
+    """
+
+    def __init__(self, title, module_name, tables, queried=()):
+        self.title = title
+        self.module_name = module_name
+        self.tables = tables
+        self.queried = list(queried)
+
+    @property
+    def slug(self):
+        return self.module_name.rsplit('.', 1)[-1]
+
+    def module(self):
+        return load_module(self.module_name)
+
+    def queries(self, store):
+        """Whether run() queries its rows from store rather than taking whole tables."""
+        return bool(self.queried) and store is not None and store.sql is not None
+
+    def tables_for(self, store):
+        """The tables run() needs loaded whole with this store."""
+        if not self.queries(store):
+            return self.tables
+        return [name for name in self.tables if name not in self.queried]
+
+    def run(self, data, store=None):
+        """Imports the page on first use and renders it with the tables in data (see tables_for)."""
+        with phase('import'):
+            module = self.module()
+        args = [data.get(name) for name in self.tables]
+        if self.queries(store):
+            module.run(*args, store=store)
+        else:
+            module.run(*args)
+
+    def report(self, data):
+        return self.module().report(*(data[name] for name in self.tables))
+
+    def warm(self, data):
+        """Precomputes what the page derives from its tables alone, if the module has a warmup()."""
+        warmup = getattr(self.module(), 'warmup', None)
+        if warmup is not None:
+            warmup(*(data[name] for name in self.tables))
+
+PAGES = [
+    Page("Driver Performance", 'models.driver_performance', ['drivers', 'results', 'driver_standings', 'races'],
+         queried=['results', 'driver_standings', 'races']),
+    Page("Qualifying vs Race Performance", 'models.qualifying_vs_race', ['qualifying', 'results', 'drivers'],
+         queried=['qualifying', 'results']),
+    Page("Pit Stop Strategies", 'models.pit_stop_strategies', ['pit_stops', 'results']),
+    Page("Head-to-Head Analysis", 'models.head_to_head', ['results', 'drivers', 'races']),
+    Page("Hypothetical Driver Swaps", 'models.hypothetical_swaps', ['results', 'drivers', 'driver_standings']),
+    Page("Driver Movements", 'models.driver_movements', ['results', 'drivers', 'constructors', 'races']),
+    Page("Team Performance", 'models.team_performance', ['results', 'constructors', 'races'], queried=['results']),
+    Page("Driver Consistency", 'models.driver_consistency', ['drivers', 'results', 'constructors']),
+    Page("Lap Time Efficiency", 'models.lap_time_efficiency', ['lap_time_stats', 'races']),
+    Page("Best Team Lineup", 'models.best_team_lineup', ['results', 'driver_standings', 'drivers']),
+    Page("Predict 2025 Season", 'models.predict_2025',
+         ['driver_standings', 'constructor_standings', 'races', 'drivers', 'constructors']),
+    Page("Struggling Teams", 'models.struggling_teams', ['results', 'constructors']),
+    Page("Driver Track Struggles", 'models.track_struggles', ['results', 'races', 'drivers'], queried=['results']),
+    Page("Championship Retention", 'models.championship_retention', ['results', 'races']),
+    Page("Champion Age Trends", 'models.champion_age_trends', ['results', 'races', 'drivers']),
+]
+PAGES_BY_TITLE = {page.title: page for page in PAGES}
+
+# Page modules are imported the first time they are asked for, never at startup. Each import
+# is timed together with the top-level packages it pulled in for the first time (matplotlib,
+# plotly, ...); seaborn and sklearn are imported inside the functions that draw or fit.
+_import_times = {}
+_import_lock = threading.Lock()
+_prewarm_thread = None
+
+def _top_level_modules():
+    return {name.split('.', 1)[0] for name in list(sys.modules)}
+
+def load_module(module_name):
+    """Imports a page module, recording how long the first import took."""
+    module = sys.modules.get(module_name)
+    if module is not None and module_name in _import_times:
+        return module
+    with _import_lock:
+        if module_name in sys.modules and module_name in _import_times:
+            return sys.modules[module_name]
+        before = _top_level_modules()
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        _import_times[module_name] = {
+            'module': module_name,
+            'seconds': round(time.perf_counter() - start, 4),
+            'new_packages': sorted(_top_level_modules() - before - {'models'}),
+            'thread': threading.current_thread().name,
+        }
+    return module
+
+def import_times():
+    """First-import time of every page module imported so far, slowest first."""
+    return sorted(_import_times.values(), key=lambda record: -record['seconds'])
+
+def prewarm(titles=None):
+    """Imports the given pages (all by default, in order) on a background thread; starts at most once."""
+    global _prewarm_thread
+    with _import_lock:
+        if _prewarm_thread is not None:
+            return _prewarm_thread
+        pages = [PAGES_BY_TITLE[title] for title in titles] if titles else PAGES
+
+        def warm():
+            for page in pages:
+                try:
+                    page.module()
+                except Exception:
+                    pass  # The page reports its own import error when it is opened
+
+        _prewarm_thread = threading.Thread(target=warm, name='page-prewarm', daemon=True)
+        _prewarm_thread.start()
+        return _prewarm_thread
@@ -0,0 +1,67 @@
+import math
+import numpy as np
+import streamlit as st
+from utils.memo import memoize_frames
+
+# Rows sent to the browser per page
+PAGE_SIZE = 25
+
+def top_k_positions(values, k, descending=True):
+    """Positions of the k best values in order, without sorting the rest.
+
+    np.partition finds the k-th value in linear time; only the rows ahead of it are sorted.
+    Ties keep their row order and NaN comes last, exactly as a stable full sort would give, so
+    consecutive pages never repeat or skip a row.
+    """
+    keys = np.asarray(values, dtype='float64')
+    keys = -keys if descending else keys.copy()
+    keys[np.isnan(keys)] = np.inf
+    if k >= len(keys):
+        return np.argsort(keys, kind='mergesort')
+    if k <= 0:
+        return np.array([], dtype=np.intp)
+    kth = np.partition(keys, k - 1)[k - 1]
+    ahead = np.flatnonzero(keys < kth)
+    chosen = np.concatenate([ahead, np.flatnonzero(keys == kth)[:k - len(ahead)]])
+    return chosen[np.argsort(keys[chosen], kind='mergesort')]
+
+@memoize_frames
+def ranked_positions(df, column, k, descending=True):
+    """top_k_positions over a column of df, cached per frame for reruns."""
+    return top_k_positions(df[column].to_numpy(), k, descending)
+
+def filter_rows(df, columns, query):
+    """Rows where any of the text columns contains query (case-insensitive)."""
+    query = query.strip()
+    if not query or not columns:
+        return df
+    mask = np.zeros(len(df), dtype=bool)
+    for col in columns:
+        mask |= df[col].astype(str).str.contains(query, case=False, regex=False).to_numpy()
+    return df[mask]
+
+def paged_table(df, key, sort_by=None, descending=True, search=None, page_size=PAGE_SIZE, container=st):
+    """Shows df one page at a time, sorted and filtered on the server; returns the rows shown.
+
+    sort_by is the default sort column (None keeps the frame's order); the user can pick any
+    other numeric column and the direction. search lists the text columns the filter box
+    matches. Only the rows of the current page are ever serialized, however long the frame is.
+    """
+    rows = filter_rows(df, search, container.text_input("Filter", key=f"{key}_filter")) if search else df
+    numeric = [col for col in df.columns if df[col].dtype.kind in 'biuf']
+    if sort_by is not None and numeric:
+        sort_by = container.selectbox("Sort by", numeric, index=numeric.index(sort_by), key=f"{key}_sort")
+        descending = container.checkbox("Descending", value=descending, key=f"{key}_descending")
+    pages = max(1, math.ceil(len(rows) / page_size))
+    page = int(container.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1,
+                                      key=f"{key}_page")) if pages > 1 else 1
+    page = min(page, pages)  # A page number kept from before the filter narrowed the rows
+    start, stop = (page - 1) * page_size, min(page * page_size, len(rows))
+    if sort_by is None:
+        visible = rows.iloc[start:stop]
+    else:
+        # Only the first `stop` rows are ranked; the rest are never sorted
+        visible = rows.iloc[ranked_positions(rows, sort_by, stop, descending)[start:stop]]
+    container.dataframe(visible)
+    container.caption(f"Rows {start + 1 if len(rows) else 0}–{stop} of {len(rows)}")
+    return visible
@@ -0,0 +1,32 @@
+import numpy as np
+from utils.memo import memoize_frames
+
+class PartitionIndex:
+    """Rows of a frame grouped by a key: a copy sorted by key plus the offsets of each key's run.
+
+    get() returns a positional slice of the sorted copy, which pandas serves as a view, so a
+    lookup costs O(rows of that key) instead of a boolean scan over the whole frame.
+    """
+
+    def __init__(self, df, keys):
+        keys = np.asarray(keys)
+        order = np.argsort(keys, kind='mergesort')  # Stable: each key keeps its file order
+        self.frame = df.iloc[order]
+        sorted_keys = keys[order]
+        unique_keys, starts = np.unique(sorted_keys, return_index=True)
+        stops = np.r_[starts[1:], len(sorted_keys)]
+        self._offsets = dict(zip(unique_keys.tolist(), zip(starts.tolist(), stops.tolist())))
+
+    def get(self, value):
+        """Rows whose key equals value (an empty frame if there are none)."""
+        start, stop = self._offsets.get(value, (0, 0))
+        return self.frame.iloc[start:stop]
+
+@memoize_frames
+def partition_index(df, key):
+    """PartitionIndex of df on one of its columns (driverId, constructorId, raceId, ...)."""
+    return PartitionIndex(df, df[key].to_numpy())
+
+def rows_for(df, key, value):
+    """Shorthand for partition_index(df, key).get(value)."""
+    return partition_index(df, key).get(value)
@@ -0,0 +1,140 @@
+import contextlib
+import contextvars
+import json
+import os
+import threading
+import time
+import tracemalloc
+
+# Profiles are appended here, one JSON object per page run
+DEFAULT_LOG = os.environ.get('F1_PROFILE_LOG', os.path.join('logs', 'profile.jsonl'))
+
+_active = contextvars.ContextVar('page_profile', default=None)
+_log_lock = threading.Lock()
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_NO_OP = contextlib.nullcontext()
+
+class PageProfile:
+    """Wall time and (optionally) peak traced memory of the phases of one page run.
+
+    Phases nest: 'load' and 'compute' wrap the page, and hooks inside it ('fit', 'render')
+    carve out their share. Each phase reports its inclusive time and its self time, i.e.
+    minus the phases nested in it, so the self times of a run add up to its total.
+    tracemalloc is process-wide, so with memory tracking on, concurrent sessions see
+    each other's allocations in their peaks.
+    """
+
+    def __init__(self, page, track_memory=False):
+        self.page = page
+        self.track_memory = track_memory
+        self.phases = []
+        self._stack = []
+        self.error = None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        entry = {'phase': name, 'depth': len(self._stack), 'children': 0.0}
+        if self.track_memory:
+            if self._stack:
+                # Keep the parent's peak so far before the counter is reset for this phase
+                self._stack[-1]['peak'] = max(self._stack[-1].get('peak', 0), tracemalloc.get_traced_memory()[1])
+            if hasattr(tracemalloc, 'reset_peak'):  # Python 3.9+; otherwise peaks are since page start
+                tracemalloc.reset_peak()
+        self._stack.append(entry)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - start
+            self._stack.pop()
+            record = {'phase': name, 'depth': entry['depth'], 'seconds': round(seconds, 4),
+                      'self_seconds': round(seconds - entry['children'], 4)}
+            if self.track_memory:
+                peak = max(entry.get('peak', 0), tracemalloc.get_traced_memory()[1])
+                record['peak_mb'] = round(peak / 2 ** 20, 2)
+            if self._stack:
+                parent = self._stack[-1]
+                parent['children'] += seconds
+                if self.track_memory:
+                    parent['peak'] = max(parent.get('peak', 0), peak)
+            self.phases.append(record)
+
+    def totals(self):
+        """Self time and largest peak per phase name, in first-seen order."""
+        totals = {}
+        for record in self.phases:
+            total = totals.setdefault(record['phase'], {'phase': record['phase'], 'seconds': 0.0})
+            total['seconds'] = round(total['seconds'] + record['self_seconds'], 4)
+            if 'peak_mb' in record:
+                total['peak_mb'] = max(total.get('peak_mb', 0), record['peak_mb'])
+        return list(totals.values())
+
+    def to_record(self):
+        return {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'page': self.page,
+            'pid': os.getpid(),
+            'seconds': round(sum(r['self_seconds'] for r in self.phases), 4),
+            'track_memory': self.track_memory,
+            'error': self.error,
+            'phases': self.phases,
+        }
+
+def phase(name):
+    """Times a block as a phase of the running page profile; a shared no-op when profiling is off."""
+    profile = _active.get()
+    if profile is None:
+        return _NO_OP
+    return profile.phase(name)
+
+def _start_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracing_users += 1
+
+def _stop_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+def write_record(record, log_path=DEFAULT_LOG):
+    """Appends one profile to the JSONL log."""
+    with _log_lock:
+        try:
+            directory = os.path.dirname(log_path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(log_path, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+        except OSError:
+            pass  # Profiling must never break the page
+
+@contextlib.contextmanager
+def profile_page(page, enabled=False, track_memory=False, log_path=DEFAULT_LOG):
+    """Makes phase() record into a new PageProfile for the duration of a page run.
+
+    Yields the profile (None when disabled) and appends it to log_path when the run ends,
+    including runs that raise.
+    """
+    if not enabled:
+        yield None
+        return
+    profile = PageProfile(page, track_memory)
+    if track_memory:
+        _start_tracing()
+    token = _active.set(profile)
+    try:
+        yield profile
+    except BaseException as exc:
+        profile.error = type(exc).__name__
+        raise
+    finally:
+        _active.reset(token)
+        if track_memory:
+            _stop_tracing()
+        write_record(profile.to_record(), log_path)
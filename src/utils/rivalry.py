@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+from utils.memo import memoize_frames
+
+@memoize_frames
+def finishing_pairs(results):
+    """Returns one row per race and ordered pair of finishers: driver1 finished ahead of driver2.
+
+    Races are grouped by field size; every race of the same size is laid out as one row of a
+    2-D array, so the upper-triangle pairs of all of them are taken in a single indexing step.
+    """
+    ordered = results[['raceId', 'driverId', 'positionOrder']].sort_values(
+        ['raceId', 'positionOrder'], kind='mergesort')
+    race_ids = ordered['raceId'].to_numpy()
+    driver_ids = ordered['driverId'].to_numpy()
+
+    starts = np.flatnonzero(np.r_[True, race_ids[1:] != race_ids[:-1]])
+    sizes = np.diff(np.r_[starts, len(race_ids)])
+
+    pair_races, ahead, behind = [], [], []
+    for size in np.unique(sizes):
+        if size < 2:
+            continue
+        rows = starts[sizes == size][:, None] + np.arange(size)  # (races, size) positions
+        i, j = np.triu_indices(size, 1)
+        ahead.append(driver_ids[rows[:, i]].ravel())
+        behind.append(driver_ids[rows[:, j]].ravel())
+        pair_races.append(np.repeat(race_ids[rows[:, 0]], len(i)))
+
+    if not pair_races:
+        return pd.DataFrame({'raceId': [], 'driver1': [], 'driver2': []}, dtype='int32')
+    return pd.DataFrame({
+        'raceId': np.concatenate(pair_races),
+        'driver1': np.concatenate(ahead),
+        'driver2': np.concatenate(behind),
+    })
+
+def _new_races_only(results, old_length):
+    """The rows appended to results, or None if any of them belongs to a race that already had rows."""
+    added = results.iloc[old_length:]
+    if np.isin(added['raceId'].to_numpy(), results['raceId'].to_numpy()[:old_length]).any():
+        return None  # A race's field was split across the append: its pairs must be redone
+    return added
+
+@finishing_pairs.incremental
+def _finishing_pairs_appended(previous, results, appended=None):
+    added = _new_races_only(results, appended[0])
+    if added is None:
+        return None
+    pairs = pd.concat([previous, finishing_pairs.__wrapped__(added)], ignore_index=True)
+    if len(previous) and len(pairs) > len(previous) and pairs['raceId'].iloc[len(previous):].min() < previous['raceId'].max():
+        pairs = pairs.sort_values('raceId', kind='mergesort', ignore_index=True)
+    return pairs
+
+def race_ids_for_seasons(races, first_year=None, last_year=None):
+    """Returns the raceIds held between two seasons (inclusive) as a sorted tuple."""
+    mask = np.ones(len(races), dtype=bool)
+    if first_year is not None:
+        mask &= (races['year'] >= first_year).to_numpy()
+    if last_year is not None:
+        mask &= (races['year'] <= last_year).to_numpy()
+    return tuple(np.sort(races.loc[mask, 'raceId'].to_numpy()).tolist())
+
+def _pairs_in(results, race_ids):
+    pairs = finishing_pairs(results)
+    if race_ids is None:
+        return pairs
+    return pairs[np.isin(pairs['raceId'].to_numpy(), np.asarray(race_ids))]
+
+@memoize_frames(bounded='race_ids')
+def head_to_head_table(results, race_ids=None):
+    """Returns driver1, driver2, head_to_head_wins rows: races driver1 finished ahead of driver2.
+
+    Only pairs that met are counted (np.unique over pair codes), so memory follows the number of
+    rivalries rather than drivers². race_ids (a tuple, e.g. from race_ids_for_seasons) limits the
+    count to an era; the all-seasons table stays cached, eras only in a small LRU.
+    """
+    pairs = _pairs_in(results, race_ids)
+    driver_ids, codes = np.unique(
+        np.concatenate([pairs['driver1'].to_numpy(), pairs['driver2'].to_numpy()]), return_inverse=True)
+    n = len(driver_ids)
+    ahead, behind = codes[:len(pairs)].astype(np.int64), codes[len(pairs):].astype(np.int64)
+    pair_codes, wins = np.unique(ahead * n + behind, return_counts=True)
+    return pd.DataFrame({
+        'driver1': driver_ids[pair_codes // n],
+        'driver2': driver_ids[pair_codes % n],
+        'head_to_head_wins': wins,
+    })
+
+@head_to_head_table.incremental
+def _head_to_head_appended(previous, results, race_ids=None, appended=None):
+    added = _new_races_only(results, appended[0])
+    if added is None:
+        return None
+    counts = pd.concat([previous, head_to_head_table.__wrapped__(added, race_ids)], ignore_index=True)
+    counts = counts.groupby(['driver1', 'driver2'], sort=True)['head_to_head_wins'].sum().reset_index()
+    return counts
+
+class RivalryIndex:
+    """Constant-time lookup of a driver pair's record, built once over the finishing pairs.
+
+    Pairs are sorted by an unordered (low id, high id) key, so every race two drivers shared
+    is one contiguous slice; a dict maps each key to its slice bounds.
+    """
+
+    def __init__(self, pairs):
+        ahead = pairs['driver1'].to_numpy().astype(np.int64)
+        behind = pairs['driver2'].to_numpy().astype(np.int64)
+        keys = (np.minimum(ahead, behind) << 32) | np.maximum(ahead, behind)
+        order = np.argsort(keys, kind='mergesort')  # Stable, so each slice stays in race order
+
+        self.race_ids = pairs['raceId'].to_numpy()[order]
+        self.winners = ahead[order]
+        unique_keys, starts = np.unique(keys[order], return_index=True)
+        stops = np.r_[starts[1:], len(order)]
+        # Wins of the lower driverId in each slice, so a record needs no scan at lookup time
+        low_won = (self.winners == (keys[order] >> 32)).astype(np.int64)
+        low_wins = np.add.reduceat(low_won, starts) if len(starts) else starts
+        self._slices = dict(zip(unique_keys.tolist(),
+                                zip(starts.tolist(), stops.tolist(), low_wins.tolist())))
+
+    def _slice(self, driver_a, driver_b):
+        low, high = sorted((int(driver_a), int(driver_b)))
+        return self._slices.get((low << 32) | high)
+
+    def record(self, driver_a, driver_b):
+        """Returns (wins of driver_a over driver_b, wins of driver_b over driver_a, shared races)."""
+        bounds = self._slice(driver_a, driver_b)
+        if bounds is None:
+            return 0, 0, 0
+        start, stop, low_wins = bounds
+        shared = stop - start
+        wins_a = low_wins if int(driver_a) <= int(driver_b) else shared - low_wins
+        return wins_a, shared - wins_a, shared
+
+    def timeline(self, driver_a, driver_b):
+        """Returns the shared races as raceId and the driverId that finished ahead."""
+        bounds = self._slice(driver_a, driver_b)
+        start, stop = bounds[:2] if bounds is not None else (0, 0)
+        return pd.DataFrame({'raceId': self.race_ids[start:stop], 'ahead': self.winners[start:stop]})
+
+@memoize_frames(bounded='race_ids')
+def rivalry_index(results, race_ids=None):
+    """Returns the RivalryIndex over all races, or over the given race_ids (kept in a small LRU)."""
+    pairs = _pairs_in(results, race_ids)
+    return RivalryIndex(pairs.sort_values('raceId', kind='mergesort'))
@@ -0,0 +1,114 @@
+# Column types for every dataset in the Ergast dump.
+# Integer columns that never contain '\N' use plain numpy ints sized to their range,
+# columns that can be missing use pandas' nullable ints (or float), and short repeated
+# strings are stored as categoricals. Columns not listed here are left to pandas.
+
+# Values that mean "missing" in the source CSVs
+NA_VALUES = ['\\N', '']
+
+SCHEMAS = {
+    'drivers': {
+        'driverId': 'int32',
+        'driverRef': 'object',
+        'number': 'Int16',
+        'code': 'category',
+        'forename': 'object',
+        'surname': 'object',
+        'dob': 'object',
+        'nationality': 'category',
+        'url': 'object',
+    },
+    'constructors': {
+        'constructorId': 'int32',
+        'constructorRef': 'category',
+        'name': 'object',
+        'nationality': 'category',
+        'url': 'object',
+    },
+    'results': {
+        'resultId': 'int32',
+        'raceId': 'int32',
+        'driverId': 'int32',
+        'constructorId': 'int32',
+        'number': 'Int16',
+        'grid': 'int16',
+        'position': 'Int16',
+        'positionText': 'category',
+        'positionOrder': 'int16',
+        'points': 'float32',
+        'laps': 'int16',
+        'time': 'object',
+        'milliseconds': 'float64',
+        'fastestLap': 'Int16',
+        'rank': 'Int16',
+        'fastestLapTime': 'object',
+        'fastestLapSpeed': 'float32',
+        'statusId': 'int16',
+    },
+    'races': {
+        'raceId': 'int32',
+        'year': 'int16',
+        'round': 'int16',
+        'circuitId': 'int32',
+        'name': 'object',
+        'date': 'object',
+        'time': 'object',
+        'url': 'object',
+        'fp1_date': 'object',
+        'fp1_time': 'object',
+        'fp2_date': 'object',
+        'fp2_time': 'object',
+        'fp3_date': 'object',
+        'fp3_time': 'object',
+        'quali_date': 'object',
+        'quali_time': 'object',
+        'sprint_date': 'object',
+        'sprint_time': 'object',
+    },
+    'pit_stops': {
+        'raceId': 'int32',
+        'driverId': 'int32',
+        'stop': 'int16',
+        'lap': 'int16',
+        'time': 'object',
+        'duration': 'object',
+        'milliseconds': 'int32',
+    },
+    'lap_times': {
+        'raceId': 'int32',
+        'driverId': 'int32',
+        'lap': 'int16',
+        'position': 'Int16',
+        'time': 'object',
+        'milliseconds': 'int32',
+    },
+    'driver_standings': {
+        'driverStandingsId': 'int32',
+        'raceId': 'int32',
+        'driverId': 'int32',
+        'points': 'float32',
+        'position': 'int16',
+        'positionText': 'category',
+        'wins': 'int16',
+    },
+    'constructor_standings': {
+        'constructorStandingsId': 'int32',
+        'raceId': 'int32',
+        'constructorId': 'int32',
+        'points': 'float32',
+        'position': 'int16',
+        'positionText': 'category',
+        'wins': 'int16',
+    },
+    'qualifying': {
+        'qualifyId': 'int32',
+        'raceId': 'int32',
+        'driverId': 'int32',
+        'constructorId': 'int32',
+        'number': 'int16',
+        'position': 'int16',
+        'q1': 'object',
+        'q2': 'object',
+        'q3': 'object',
+    },
+}
@@ -0,0 +1,30 @@
+import pandas as pd
+from utils.memo import memoize_frames
+
+# Season-level tables shared by the predictions and trends pages. Each is built once per
+# loaded frame (see utils.memo) and reused by every page and rerun that asks for it.
+
+@memoize_frames
+def race_years(races):
+    """raceId -> year and round, the only race columns the season tables need."""
+    return races[['raceId', 'year', 'round']]
+
+@memoize_frames
+def season_points(df, races, key='driverId'):
+    """Total points per (year, key) for a results or standings frame."""
+    merged = pd.merge(df[['raceId', key, 'points']], race_years(races)[['raceId', 'year']],
+                      on='raceId', how='left')
+    return merged.groupby(['year', key])['points'].sum().reset_index()
+
+@season_points.incremental
+def _season_points_appended(previous, df, races, key='driverId', appended=None):
+    if 0 not in appended:
+        return previous  # Only races grew: no result points moved to another season
+    added = season_points.__wrapped__(df.iloc[appended[0]:], races, key)
+    return pd.concat([previous, added]).groupby(['year', key])['points'].sum().reset_index()
+
+@memoize_frames
+def season_champions(results, races, key='driverId'):
+    """The entity with the most points in each season, ordered by year."""
+    points = season_points(results, races, key)
+    return points.loc[points.groupby('year')['points'].idxmax()].sort_values('year')
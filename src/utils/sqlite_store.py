@@ -0,0 +1,208 @@
+import os
+import sqlite3
+import threading
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_float_dtype, is_integer_dtype
+from utils.data_loader import CACHE_DIR_NAME, DATASETS, content_hash, file_signature, grew_by_appending, load_dataset
+from utils.schemas import SCHEMAS
+
+# The database lives with the parse cache, so clear_cache() removes it too
+DATABASE_NAME = 'f1.sqlite'
+# Every table gets an index on each of these columns it has
+INDEXED_COLUMNS = ['raceId', 'driverId', 'constructorId', 'circuitId', 'year']
+AGGREGATES = {'sum': 'SUM', 'mean': 'AVG', 'min': 'MIN', 'max': 'MAX', 'count': 'COUNT'}
+
+def _sql_type(dtype):
+    if is_integer_dtype(dtype):
+        return 'INTEGER'
+    if is_float_dtype(dtype):
+        return 'REAL'
+    return 'TEXT'
+
+def _rows(df):
+    """df's rows as tuples of Python values, with every kind of missing value as None."""
+    values = df.astype(object).where(df.notna(), None)
+    return list(values.itertuples(index=False, name=None))
+
+def _restore_types(df, name, columns=None):
+    """Gives the columns of a query result (or just `columns`) back the dtypes the CSV loader would have used."""
+    schema = dict(SCHEMAS.get(name, {}), year=SCHEMAS['races']['year'])
+    for col in columns or df.columns:
+        if df[col].dtype == object:
+            df[col] = df[col].where(df[col].notna(), np.nan)  # NULL comes back as None, the CSV parser gives NaN
+        if col in schema:
+            try:
+                df[col] = df[col].astype(schema[col])
+            except (TypeError, ValueError):
+                pass  # e.g. a column that came back with NULLs where the schema has none
+    return df
+
+class SQLiteStore:
+    """The datasets of a data directory copied into one SQLite file, with a small query layer on top.
+
+    Tables are (re)built by sync() when their CSV changes; rows appended to a CSV are inserted
+    without rebuilding the table. Any number of threads and processes can read the same file;
+    each thread gets its own connection, and writers take SQLite's write lock so only one of
+    them rebuilds a table.
+    """
+
+    def __init__(self, data_directory, path=None):
+        self.data_directory = data_directory
+        self.path = path or os.path.join(data_directory, CACHE_DIR_NAME, DATABASE_NAME)
+        self._local = threading.local()
+        self._columns = {}
+
+    @property
+    def connection(self):
+        con = getattr(self._local, 'connection', None)
+        if con is None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            # Autocommit: transactions are opened explicitly where a build needs one
+            con = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+            con.execute('PRAGMA journal_mode=WAL')  # Readers don't wait for a writer
+            con.execute('CREATE TABLE IF NOT EXISTS _sources '
+                        '(name TEXT PRIMARY KEY, size INTEGER, mtime_ns INTEGER, sha1 TEXT, rows INTEGER)')
+            self._local.connection = con
+        return con
+
+    def _source(self, name):
+        row = self.connection.execute(
+            'SELECT size, mtime_ns, sha1, rows FROM _sources WHERE name = ?', (name,)).fetchone()
+        return dict(zip(['size', 'mtime_ns', 'sha1', 'rows'], row)) if row else None
+
+    def sync(self, names=None):
+        """Brings the given tables (every dataset with a file by default) up to date; returns the ones written."""
+        written = []
+        for name in names or DATASETS:
+            file_path = os.path.join(self.data_directory, DATASETS[name])
+            if not os.path.exists(file_path):
+                continue
+            signature = file_signature(file_path)
+            source = self._source(name)
+            if source is not None and (source['size'], source['mtime_ns']) == (signature['size'], signature['mtime_ns']):
+                continue
+            sha1 = content_hash(file_path)
+            if source is None or source['sha1'] != sha1:
+                appended = grew_by_appending(file_path, source)
+                # Parse outside the write lock (through the parse cache); only the inserts hold it
+                df = load_dataset(self.data_directory, name)
+                if not self._write_table(name, df, appended, signature, sha1):
+                    continue
+                written.append(name)
+            else:
+                self.connection.execute('UPDATE _sources SET mtime_ns = ? WHERE name = ?',
+                                        (signature['mtime_ns'], name))  # Touched only
+        return written
+
+    def _write_table(self, name, df, appended, signature, sha1):
+        con = self.connection
+        con.execute('BEGIN IMMEDIATE')
+        try:
+            source = self._source(name)
+            if source is not None and source['sha1'] == sha1:
+                con.execute('ROLLBACK')
+                return False  # Another worker got here first
+            if appended and source is not None and source['rows'] <= len(df):
+                new_rows = df.iloc[source['rows']:]
+            else:
+                con.execute(f'DROP TABLE IF EXISTS "{name}"')
+                columns = ', '.join(f'"{col}" {_sql_type(df[col].dtype)}' for col in df.columns)
+                con.execute(f'CREATE TABLE "{name}" ({columns})')
+                for col in INDEXED_COLUMNS:
+                    if col in df.columns:
+                        con.execute(f'CREATE INDEX "{name}_{col}" ON "{name}" ("{col}")')
+                new_rows = df
+            placeholders = ', '.join('?' * len(df.columns))
+            con.executemany(f'INSERT INTO "{name}" VALUES ({placeholders})', _rows(new_rows))
+            con.execute('INSERT OR REPLACE INTO _sources VALUES (?, ?, ?, ?, ?)',
+                        (name, signature['size'], signature['mtime_ns'], sha1, len(df)))
+            con.execute('COMMIT')
+        except BaseException:
+            con.execute('ROLLBACK')
+            raise
+        self._columns.pop(name, None)
+        return True
+
+    def columns(self, name):
+        """Column names of a table, building it first if needed."""
+        if name not in self._columns:
+            self.sync([name])  # No-op unless the table is missing or stale
+            self._columns[name] = [row[1] for row in self.connection.execute(f'PRAGMA table_info("{name}")')]
+            if not self._columns[name]:
+                raise KeyError(f"No table {name!r} in {self.path}")
+        return self._columns[name]
+
+    def _where(self, name, filters, joins_year):
+        """WHERE clause and parameters for column=value (or column=[values]) filters."""
+        clauses, params = [], []
+        for col, value in filters.items():
+            qualified = self._column(name, col, joins_year)
+            if isinstance(value, (list, tuple, set)):
+                value = list(value)
+                clauses.append(f'{qualified} IN ({", ".join("?" * len(value))})' if value else '0')
+                params.extend(value)
+            else:
+                clauses.append(f'{qualified} = ?')
+                params.append(value)
+        return (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def _column(self, name, col, joins_year):
+        if col == 'year' and joins_year:
+            return 'r."year"'
+        if col not in self.columns(name):
+            raise KeyError(f"{name} has no column {col!r}")
+        return f't."{col}"'
+
+    def _prepare(self, name, with_year):
+        """Syncs the tables a query reads; returns the FROM clause and whether year comes from races."""
+        # Only races has a year; other per-race tables get it through raceId
+        joins_year = with_year and name != 'races'
+        self.sync([name, 'races'] if joins_year else [name])
+        if joins_year:
+            return f'"{name}" t LEFT JOIN races r ON r."raceId" = t."raceId"', True
+        return f'"{name}" t', False
+
+    def query(self, sql, params=(), name=None):
+        """Runs any SELECT; name restores that table's dtypes on the result."""
+        df = pd.read_sql_query(sql, self.connection, params=list(params))
+        return _restore_types(df, name) if name else df
+
+    def select(self, name, columns=None, with_year=False, **filters):
+        """Rows of a table matching the filters, e.g. select('results', ['raceId', 'points'], driverId=1).
+
+        with_year adds the season of each row (joined from races) as a column and a filter.
+        """
+        source, joins_year = self._prepare(name, with_year)
+        columns = list(columns or self.columns(name))
+        if joins_year and 'year' not in columns:
+            columns.append('year')
+        select_list = ', '.join(f'{self._column(name, col, joins_year)} AS "{col}"' for col in columns)
+        where, params = self._where(name, filters, joins_year)
+        return self.query(f'SELECT {select_list} FROM {source}{where} ORDER BY t.rowid', params, name)
+
+    def aggregate(self, name, by, column, how='sum', with_year=False, **filters):
+        """how(column) per group of the `by` columns, computed by SQLite, e.g. season points per driver."""
+        source, joins_year = self._prepare(name, with_year)
+        by = [by] if isinstance(by, str) else list(by)
+        group = ', '.join(self._column(name, col, joins_year) for col in by)
+        select_list = ', '.join(f'{self._column(name, col, joins_year)} AS "{col}"' for col in by)
+        value = f'{AGGREGATES[how]}({self._column(name, column, joins_year)}) AS "{column}"'
+        where, params = self._where(name, filters, joins_year)
+        df = self.query(f'SELECT {select_list}, {value} FROM {source}{where} GROUP BY {group} ORDER BY {group}', params)
+        return _restore_types(df, name, by)  # The value keeps SQLite's type: a mean of ints is not an int
+
+    def table(self, name):
+        """A whole table as the loader would return it."""
+        return self.select(name)
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_sqlite_store(data_directory='data'):
+    """Returns the shared SQLiteStore of a data directory."""
+    with _stores_lock:
+        store = _stores.get(data_directory)
+        if store is None:
+            store = _stores[data_directory] = SQLiteStore(data_directory)
+        return store
@@ -0,0 +1,52 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from utils.model_registry import fingerprint, get_registry
+
+class TrainingScheduler:
+    """Runs model fits on a small background thread pool, one in-flight fit per key.
+
+    Pages submit a fit as early as possible, render their tables and charts while it runs,
+    and only wait on the returned future where the model is actually needed. Sessions that
+    ask for a fit that is already running share its future instead of starting another.
+    """
+
+    def __init__(self, max_workers=2):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='model-fit')
+        self._futures = {}
+        self._lock = threading.Lock()
+
+    def submit(self, key, fn, *args, **kwargs):
+        """Schedules fn(*args, **kwargs) unless a fit for key is already in flight; returns its future."""
+        with self._lock:
+            future = self._futures.get(key)
+            if future is not None:
+                return future
+            future = self._executor.submit(fn, *args, **kwargs)
+            self._futures[key] = future
+        # Outside the lock: a future that is already done runs the callback right here
+        future.add_done_callback(lambda done: self._forget(key, done))
+        return future
+
+    def _forget(self, key, future):
+        # Finished fits are served by the model registry from here on
+        with self._lock:
+            if self._futures.get(key) is future:
+                del self._futures[key]
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_scheduler():
+    """Returns the process-wide scheduler."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = TrainingScheduler()
+        return _scheduler
+
+def submit_fit(name, train, frames, params=None, registry=None):
+    """Fetches or trains a registry model in the background; returns a future of the model."""
+    registry = registry or get_registry()
+    params = params or {}
+    key = (registry.directory, name, fingerprint(frames, params))
+    return get_scheduler().submit(key, registry.get_or_train, name, train, frames, params)
@@ -0,0 +1,106 @@
+import numpy as np
+import pandas as pd
+from utils.memo import memoize_frames
+from utils.paged_table import top_k_positions
+from utils.season_tables import race_years
+
+# Row/column label of the constructors collapsed by collapsed_matrix
+OTHER = 'Other'
+
+def _entries(results, races):
+    """driverId, constructorId, raceId, year and round of every result, in file order."""
+    years = race_years(races).set_index('raceId').reindex(results['raceId'].to_numpy())
+    return (results['driverId'].to_numpy(), results['constructorId'].to_numpy(), results['raceId'].to_numpy(),
+            years['year'].to_numpy(dtype='float64'), years['round'].to_numpy(dtype='float64'))
+
+def _detect(driver, constructor, race, year, round_):
+    """Constructor changes between consecutive entries of each driver, ordered by (year, round).
+
+    One stable lexsort puts every driver's entries in race order (results of one race keep
+    their file order; races missing from races.csv go last), and comparing each entry with the
+    one before it - a shift within the driver's group - finds the changes without a Python loop.
+    """
+    order = np.lexsort((round_, year, driver))
+    driver, constructor = driver[order], constructor[order]
+    changed = np.flatnonzero((driver[1:] == driver[:-1]) & (constructor[1:] != constructor[:-1])) + 1
+    return pd.DataFrame({
+        'driverId': driver[changed],
+        'raceId': race[order][changed],
+        'year': year[order][changed],
+        'From': constructor[changed - 1],
+        'To': constructor[changed],
+    })
+
+@memoize_frames
+def transition_rows(results, races):
+    """Every constructor change between a driver's consecutive races: driverId, the raceId and
+    year of the first race with the new team, From and To. Ordered by driver, then race."""
+    return _detect(*_entries(results, races))
+
+@transition_rows.incremental
+def _transition_rows_appended(previous, results, races, appended=None):
+    if 0 not in appended:
+        return previous  # New races without results change no sequence
+    old_length = appended[0]
+    driver, constructor, race, year, round_ = _entries(results, races)
+    if np.isnan(year).any():
+        return None  # Entries of races missing from races.csv sort last; a seed could be one of them
+    old_latest = np.lexsort((round_[:old_length], year[:old_length]))[-1:]
+    new_earliest = old_length + np.lexsort((round_[old_length:], year[old_length:]))[:1]
+    if len(old_latest) and len(new_earliest) and \
+            (year[new_earliest[0]], round_[new_earliest[0]]) < (year[old_latest[0]], round_[old_latest[0]]):
+        return None  # Rows from an earlier race would be sorted into the middle of a sequence
+    # Each driver's sequence continues from their last known entry, the seed of the new rows
+    seed_order = np.lexsort((round_[:old_length], year[:old_length], driver[:old_length]))
+    seed_drivers = driver[seed_order]
+    seeds = seed_order[np.r_[seed_drivers[1:] != seed_drivers[:-1], True]] if old_length else seed_order
+    take = np.r_[seeds, np.arange(old_length, len(driver))].astype(np.intp)
+    new_rows = _detect(driver[take], constructor[take], race[take], year[take], round_[take])
+    if new_rows.empty:
+        return previous
+    rows = pd.concat([previous, new_rows], ignore_index=True)
+    return rows.sort_values('driverId', kind='mergesort', ignore_index=True)
+
+@memoize_frames
+def transition_counts(rows, first_year=None, last_year=None):
+    """From, To, Count of every transition that happened, most frequent first.
+
+    Only pairs that occurred get a row (a sparse from/to matrix in coordinate form), so memory
+    follows the number of distinct moves rather than constructors². first_year and last_year
+    limit the count to switches made in those seasons.
+    """
+    mask = np.ones(len(rows), dtype=bool)
+    if first_year is not None:
+        mask &= rows['year'].to_numpy() >= first_year
+    if last_year is not None:
+        mask &= rows['year'].to_numpy() <= last_year
+    moves = np.concatenate([rows['From'].to_numpy()[mask], rows['To'].to_numpy()[mask]])
+    constructor_ids, codes = np.unique(moves, return_inverse=True)
+    n, m = len(constructor_ids), int(mask.sum())
+    pair_codes, counts = np.unique(codes[:m].astype(np.int64) * n + codes[m:], return_counts=True)
+    order = np.argsort(-counts, kind='mergesort')
+    return pd.DataFrame({
+        'From': constructor_ids[pair_codes[order] // n],
+        'To': constructor_ids[pair_codes[order] % n],
+        'Count': counts[order],
+    })
+
+def collapsed_matrix(counts, k=15):
+    """Dense From x To matrix of the k constructors with the most moves in or out.
+
+    Every other constructor is folded into one OTHER row and column, so the matrix (and the
+    heatmap drawn from it) stays (k + 1)² however many constructors the history has.
+    """
+    totals = pd.concat([counts.groupby('From')['Count'].sum(), counts.groupby('To')['Count'].sum()])
+    totals = totals.groupby(level=0).sum()
+    top = totals.index.to_numpy()[top_k_positions(totals.to_numpy(), k)]
+    slot = pd.Series(np.arange(len(top)), index=top)
+    from_slot = slot.reindex(counts['From'].to_numpy()).fillna(len(top)).astype(np.intp).to_numpy()
+    to_slot = slot.reindex(counts['To'].to_numpy()).fillna(len(top)).astype(np.intp).to_numpy()
+    dense = np.zeros((len(top) + 1, len(top) + 1), dtype=np.int64)
+    np.add.at(dense, (from_slot, to_slot), counts['Count'].to_numpy())
+    labels = list(top) + [OTHER]
+    matrix = pd.DataFrame(dense, index=labels, columns=labels)
+    if not dense[-1].any() and not dense[:, -1].any():
+        matrix = matrix.drop(index=OTHER, columns=OTHER)  # Nothing was collapsed
+    return matrix
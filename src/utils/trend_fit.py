@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+def grouped_linear_fit(df, key, x='year', y='points', window=None, weights=None, decay=None):
+    """Fits y = intercept + slope * x for every value of key at once.
+
+    Instead of one regression per entity, the weighted sums n, Σx, Σy, Σxy and Σx² are taken
+    with a single groupby and the least-squares solution is evaluated in closed form.
+
+    window  keep only each entity's last `window` x values (e.g. the last N seasons)
+    weights name of a column holding per-row weights
+    decay   recency weighting: a row `k` steps before the entity's latest x gets weight decay ** k
+
+    Entities with a single distinct x get slope 0 and their (weighted) mean as intercept.
+    Returns a frame indexed by key with n (rows used), slope, intercept and last_x.
+    """
+    data = df[[key, x, y] + ([weights] if weights else [])].dropna(subset=[x, y])
+    if window:
+        recent_rank = data.groupby(key)[x].rank(method='first', ascending=False)
+        data = data[recent_rank <= window]
+
+    keys = data[key]
+    xs = data[x].to_numpy(dtype='float64')
+    ys = data[y].to_numpy(dtype='float64')
+    w = data[weights].to_numpy(dtype='float64') if weights else np.ones(len(data))
+    last_x = data.groupby(key)[x].transform('max').to_numpy(dtype='float64')
+    if decay is not None:
+        w = w * decay ** (last_x - xs)
+
+    # Center x to keep Σx² - (Σx)²/n well conditioned for year-sized values
+    center = xs.mean() if len(xs) else 0.0
+    xc = xs - center
+    sums = pd.DataFrame({
+        'n': np.ones(len(data)),
+        'sw': w,
+        'sx': w * xc,
+        'sy': w * ys,
+        'sxy': w * xc * ys,
+        'sxx': w * xc * xc,
+        'last_x': last_x,
+    }, index=keys.values).groupby(level=0).agg(
+        {'n': 'sum', 'sw': 'sum', 'sx': 'sum', 'sy': 'sum', 'sxy': 'sum', 'sxx': 'sum', 'last_x': 'max'})
+
+    denom = sums['sw'] * sums['sxx'] - sums['sx'] ** 2
+    flat = denom.abs() <= 1e-12 * sums['sw'] ** 2
+    slope = ((sums['sw'] * sums['sxy'] - sums['sx'] * sums['sy']) / denom.where(~flat)).fillna(0.0)
+    intercept_c = (sums['sy'] - slope * sums['sx']) / sums['sw']
+
+    fit = pd.DataFrame({
+        'n': sums['n'].astype('int64'),
+        'slope': slope,
+        'intercept': intercept_c - slope * center,
+        'last_x': sums['last_x'],
+    })
+    fit.index.name = key
+    return fit
+
+def predict(fit, x_new):
+    """Evaluates every fitted line at x_new (a scalar, or one value per row of fit)."""
+    return fit['intercept'] + fit['slope'] * x_new
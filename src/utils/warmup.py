@@ -0,0 +1,76 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from utils.page_registry import PAGES_BY_TITLE
+
+# Pages whose warmup() runs, most expensive first: the pool starts them in this order
+WARMUP_ORDER = [
+    "Head-to-Head Analysis",        # finishing pairs and the rivalry index
+    "Driver Movements",             # constructor transitions
+    "Driver Consistency",           # finish statistics (and the top-5 model fit)
+    "Driver Performance",           # season tables
+    "Predict 2025 Season",
+    "Championship Retention",
+    "Champion Age Trends",
+    "Lap Time Efficiency",          # per-circuit lap aggregates
+    "Pit Stop Strategies",
+]
+
+class Warmup:
+    """Runs the warmup() of pages on a small background pool once the data is loaded.
+
+    Everything a warmup() computes goes through utils.memo, so a page opened while its warmup
+    is still running waits for that computation instead of starting another, and a page opened
+    afterwards finds the result cached. A warmup that fails (e.g. a missing CSV) is only
+    recorded; the page raises the error itself when it is opened.
+    """
+
+    def __init__(self, store, titles=None, max_workers=2):
+        self.store = store
+        self.titles = list(titles or WARMUP_ORDER)
+        self._status = {title: {'page': title, 'state': 'queued', 'seconds': None} for title in self.titles}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='warmup')
+        # The pool takes queued work in submission order, so priority is the order of titles
+        self.futures = [self._executor.submit(self._warm, title) for title in self.titles]
+        self._executor.shutdown(wait=False)
+
+    def _warm(self, title):
+        status = self._status[title]
+        status['state'] = 'running'
+        start = time.perf_counter()
+        try:
+            page = PAGES_BY_TITLE[title]
+            if page.queries(self.store):
+                status['state'] = 'skipped'  # The page queries its rows; nothing to precompute
+            else:
+                page.warm(self.store.tables(page.tables))
+                status['state'] = 'done'
+        except Exception as exc:
+            status['state'] = f"failed: {type(exc).__name__}"
+        status['seconds'] = round(time.perf_counter() - start, 4)
+
+    def done(self):
+        return all(future.done() for future in self.futures)
+
+    def wait(self, timeout=None):
+        """Blocks until every warmup has finished (or timeout seconds have passed)."""
+        wait(self.futures, timeout)
+
+    def status(self):
+        """State and duration of every page's warmup, in priority order."""
+        return [dict(self._status[title]) for title in self.titles]
+
+_warmups = {}
+_warmups_lock = threading.Lock()
+
+def start_warmup(store, titles=None, restart=False):
+    """Starts warming up a store's pages unless that already happened; restart=True runs it again.
+
+    Restart after the store dropped its derived results (refresh/reload). Pages whose results
+    are still cached finish at once.
+    """
+    with _warmups_lock:
+        warmup = _warmups.get(id(store))
+        if warmup is None or (restart and warmup.done()):
+            warmup = _warmups[id(store)] = Warmup(store, titles)
+        return warmup